@@ -2,18 +2,22 @@ from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials
 
+from app.api.schemas import TokenPrincipal
+from app.core.config import settings
 from app.core.security import security
+from app.core.tracing import traced
 from app.models import User, UserRole
 from app.repositories.user_repository import user_repository
 
 
+@traced("auth.get_current_user")
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security.security)
 ) -> User:
     """Get current authenticated user."""
     user_id = security.get_current_user_id(credentials)
     
-    user = await user_repository.get_by_id(user_id)
+    user = await user_repository.get_active_by_id(user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -41,9 +45,42 @@ async def get_current_active_user(
     return current_user
 
 
+@traced("auth.get_current_principal")
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security.security)
+) -> TokenPrincipal:
+    """Get identity and role of the current user.
+    
+    In stateless mode they come from the access token claims, checked only
+    against the cached token version; otherwise the user is loaded.
+    """
+    payload = security.get_access_token_payload(credentials)
+    user_id = str(payload["sub"])
+    
+    if not settings.STATELESS_AUTH_ENABLED or "role" not in payload:
+        user = await get_current_user(credentials)
+        return TokenPrincipal(id=str(user.id), role=user.role, is_active=user.is_active)
+    
+    token_version = await user_repository.get_token_version(user_id)
+    if token_version is None or token_version != payload.get("ver"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not payload.get("active"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    
+    return TokenPrincipal(id=user_id, role=payload["role"], is_active=True)
+
+
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: TokenPrincipal = Depends(get_current_principal)
+) -> TokenPrincipal:
     """Get current admin user."""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -55,7 +92,7 @@ async def get_current_admin_user(
 
 def require_roles(*required_roles: UserRole):
     """Decorator to require specific roles."""
-    def role_checker(current_user: User = Depends(get_current_active_user)) -> User:
+    def role_checker(current_user: TokenPrincipal = Depends(get_current_principal)) -> TokenPrincipal:
         if current_user.role not in required_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
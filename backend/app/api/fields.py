@@ -0,0 +1,83 @@
+from functools import lru_cache
+from typing import Any, FrozenSet, Iterable, List, Optional, Tuple, Type
+
+from fastapi import HTTPException, Query, status
+from pydantic import BaseModel, create_model
+
+
+@lru_cache(maxsize=256)
+def projection_model(schema: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """Build a subset of a response schema usable as a Beanie projection.
+
+    Unselected fields become optional and default to None, so documents
+    fetched with the projection still validate. Validators and config are
+    inherited from the schema.
+    """
+    overrides = {
+        name: (Optional[field.annotation], None)
+        for name, field in schema.model_fields.items()
+        if name not in fields
+    }
+    projection = {
+        schema.model_fields[name].alias or name: 1
+        for name in sorted(fields)
+    }
+    # Beanie reads the projection from a Settings attribute of the model
+    settings = type("Settings", (), {"projection": projection})
+    mixin = type(f"{schema.__name__}ProjectionSettings", (), {"Settings": settings})
+
+    return create_model(
+        f"{schema.__name__}Projection",
+        __base__=(schema, mixin),
+        **overrides
+    )
+
+
+class SparseFields:
+    """A validated ?fields= selection for one response schema."""
+
+    def __init__(self, schema: Type[BaseModel], fields: Tuple[str, ...], always: Tuple[str, ...] = ()):
+        self.include = frozenset(fields)
+        # Fields the service needs internally (e.g. for cursors) are fetched but not returned
+        self.model = projection_model(schema, self.include | frozenset(always))
+
+    def dump(self, obj: Any) -> dict:
+        """Serialize a document or projection instance to the selected fields only."""
+        if not isinstance(obj, self.model):
+            obj = self.model.model_validate(obj, from_attributes=True)
+        return obj.model_dump(mode="json", by_alias=True, include=self.include)
+
+    def dump_all(self, objs: Iterable[Any]) -> List[dict]:
+        return [self.dump(obj) for obj in objs]
+
+
+class FieldSelector:
+    """Dependency parsing the fields query parameter against a response schema."""
+
+    def __init__(self, schema: Type[BaseModel], always: Iterable[str] = ()):
+        self.schema = schema
+        self.always = tuple(always)
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(
+            None, description="Comma-separated list of fields to return"
+        )
+    ) -> Optional[SparseFields]:
+        if fields is None:
+            return None
+
+        requested = tuple(dict.fromkeys(
+            name.strip() for name in fields.split(",") if name.strip()
+        ))
+        unknown = [name for name in requested if name not in self.schema.model_fields]
+        if not requested or unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=(
+                    f"Invalid fields: {', '.join(unknown) or fields!r}. "
+                    f"Allowed: {', '.join(self.schema.model_fields)}"
+                )
+            )
+
+        return SparseFields(self.schema, requested, self.always)
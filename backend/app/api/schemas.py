@@ -1,10 +1,12 @@
 from datetime import datetime
+from enum import Enum
 from typing import Optional, List, Any
 from decimal import Decimal
 
 from pydantic import BaseModel, Field, EmailStr, validator
 from bson import ObjectId
 
+from app.core.money import Amount
 from app.models import (
     UserRole, 
     NotificationPreference, 
@@ -104,6 +106,13 @@ class TokenPayload(BaseModel):
     iat: Optional[int] = None
 
 
+class TokenPrincipal(BaseModel):
+    """Identity and role of the authenticated caller."""
+    id: str
+    role: UserRole
+    is_active: bool
+
+
 # Fund Schemas
 class FundBase(BaseModel):
     name: str = Field(..., min_length=3, max_length=100)
@@ -165,7 +174,7 @@ class TransactionResponse(BaseModel):
     user_id: str
     fund_id: str  # Changed to string to match MongoDB schema
     type: TransactionType  # Changed from transaction_type
-    amount: Decimal
+    amount: Amount  # Projected rows carry the raw stored value
     status: TransactionStatus
     description: Optional[str] = None
     created_at: datetime
@@ -184,12 +193,19 @@ class TransactionResponse(BaseModel):
         return v
 
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
 class TransactionHistoryResponse(BaseModel):
     transactions: List[TransactionResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when include_total is false
+    page: Optional[int] = None  # None when paging by cursor
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 
 # User Fund Subscription Schemas
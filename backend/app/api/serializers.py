@@ -0,0 +1,60 @@
+import enum
+import typing
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterable, List, Tuple, Type
+
+from pydantic import BaseModel
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _converter_for(annotation: Any) -> Callable[[Any], Any]:
+    """Pick the JSON-mode conversion Pydantic would apply to a field type."""
+    # Optional[X] -> X; None is handled by the caller
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        annotation = args[0]
+
+    if not isinstance(annotation, type):
+        return _identity
+    if issubclass(annotation, enum.Enum):
+        return lambda value: value.value
+    if issubclass(annotation, Decimal):
+        return str
+    if issubclass(annotation, datetime):
+        return lambda value: value.isoformat()
+    if issubclass(annotation, str):
+        # Covers ObjectId ids, which the schemas' validators turn into str
+        return str
+    return _identity
+
+
+class DocumentSerializer:
+    """Converts trusted documents straight into response dicts.
+
+    Documents loaded through Beanie are already validated, so instead of
+    validating them again into the response schema, each field is read and
+    converted with a converter chosen once per schema. The output matches
+    what FastAPI produces for response_model=schema (aliases, Decimals as
+    strings, ISO datetimes, enum values).
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        self._fields: List[Tuple[str, str, Callable[[Any], Any]]] = [
+            (field.alias or name, name, _converter_for(field.annotation))
+            for name, field in schema.model_fields.items()
+        ]
+
+    def dump(self, document: Any) -> dict:
+        row = {}
+        for key, attribute, convert in self._fields:
+            value = getattr(document, attribute, None)
+            row[key] = None if value is None else convert(value)
+        return row
+
+    def dump_all(self, documents: Iterable[Any]) -> List[dict]:
+        return [self.dump(document) for document in documents]
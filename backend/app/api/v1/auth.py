@@ -41,8 +41,14 @@ async def refresh_token(
 
 
 @router.post("/logout", response_model=APIResponse)
-async def logout():
-    """Logout user (client-side token removal)."""
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security.security)
+):
+    """Logout user, revoking the refresh token sent as bearer credentials.
+    
+    Access tokens and invalid tokens are rejected with 401.
+    """
+    await auth_service.logout(credentials.credentials)
     return APIResponse(
         success=True,
         message="Successfully logged out. Please remove tokens from client storage."
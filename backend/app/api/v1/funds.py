@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from typing import List, Optional
 from decimal import Decimal
 
 from app.api.deps import get_current_active_user
+from app.api.fields import FieldSelector, SparseFields
 from app.api.schemas import (
     FundResponse,
     SubscriptionRequest,
@@ -15,13 +16,19 @@ from app.services.fund_service import fund_service
 
 router = APIRouter()
 
+fund_fields = FieldSelector(FundResponse)
+
 
 @router.get("/", response_model=APIResponse)
 async def get_funds(
+    fields: Optional[SparseFields] = Depends(fund_fields),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get all available funds."""
     funds = await fund_service.get_all_funds(is_active=True)
+    if fields:
+        # Funds come from the in-memory catalog; only the output is trimmed
+        funds = fields.dump_all(funds)
     return APIResponse(
         success=True,
         message="Funds retrieved successfully",
@@ -1,8 +1,16 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from typing import Optional
 
 from app.api.deps import get_current_active_user, get_current_admin_user
+from app.api.fields import FieldSelector, SparseFields
+from app.api.serializers import DocumentSerializer
+from app.core.json_encoder import CustomJSONResponse
 from app.api.schemas import (
+    ExportFormat,
+    TokenPrincipal,
     TransactionHistoryResponse,
     TransactionResponse,
     APIResponse
@@ -13,6 +21,10 @@ from app.services.transaction_service import transaction_service
 
 router = APIRouter()
 
+# Cursors are built from id and created_at, so they are always fetched
+transaction_fields = FieldSelector(TransactionResponse, always=("id", "created_at"))
+transaction_serializer = DocumentSerializer(TransactionResponse)
+
 
 @router.get("/history", response_model=TransactionHistoryResponse)
 async def get_transaction_history(
@@ -20,15 +32,54 @@ async def get_transaction_history(
     size: int = Query(10, ge=1, le=100, description="Page size"),
     transaction_type: Optional[TransactionType] = Query(None, description="Filter by transaction type"),
     status: Optional[TransactionStatus] = Query(None, description="Filter by status"),
+    cursor: Optional[str] = Query(None, description="next_cursor/prev_cursor from a previous page; overrides page"),
+    include_total: bool = Query(True, description="Count total transactions and pages"),
+    fields: Optional[SparseFields] = Depends(transaction_fields),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user transaction history with pagination."""
-    return await transaction_service.get_transaction_history(
+    result = await transaction_service.get_transaction_history(
         user_id=str(current_user.id),
         page=page,
         size=size,
         transaction_type=transaction_type,
-        transaction_status=status
+        transaction_status=status,
+        cursor=cursor,
+        include_total=include_total,
+        projection=fields.model if fields else None
+    )
+    
+    # Rows are already-validated documents; skip response_model re-validation
+    serializer = fields or transaction_serializer
+    return CustomJSONResponse({**result, "transactions": serializer.dump_all(result["transactions"])})
+
+
+@router.get("/export")
+async def export_transactions(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Export format"),
+    date_from: Optional[datetime] = Query(None, description="Include transactions created at or after this date (UTC unless an offset is given)"),
+    date_to: Optional[datetime] = Query(None, description="Include transactions created before this date (UTC unless an offset is given)"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream the user's full transaction history for download."""
+    chunks = await transaction_service.export_transactions(
+        user_id=str(current_user.id),
+        export_format=format,
+        date_from=date_from,
+        date_to=date_to
+    )
+    
+    if format == ExportFormat.CSV:
+        media_type = "text/csv; charset=utf-8"
+    else:
+        media_type = "application/x-ndjson"
+    
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="transactions.{format.value}"'
+        }
     )
 
 
@@ -47,7 +98,14 @@ async def get_transaction(
 @router.get("/admin/recent", response_model=list[TransactionResponse])
 async def get_recent_transactions(
     limit: int = Query(10, ge=1, le=50, description="Number of transactions to return"),
-    current_user: User = Depends(get_current_admin_user)
+    fields: Optional[SparseFields] = Depends(transaction_fields),
+    current_user: TokenPrincipal = Depends(get_current_admin_user)
 ):
     """Get recent transactions (Admin only)."""
-    return await transaction_service.get_recent_transactions(limit=limit)
+    transactions = await transaction_service.get_recent_transactions(
+        limit=limit,
+        projection=fields.model if fields else None
+    )
+    
+    serializer = fields or transaction_serializer
+    return CustomJSONResponse(serializer.dump_all(transactions))
@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Generic, Hashable, Optional, Set, Tuple, TypeVar
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Size-bounded in-process LRU cache whose entries expire after a TTL.
+    
+    Not thread-safe; meant to be used from the event loop only.
+    """
+    
+    def __init__(self, maxsize: int, ttl: float, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Named caches also report lookups to /metrics
+        self._hit_metric = CACHE_REQUESTS.labels(name, "hit") if name else None
+        self._miss_metric = CACHE_REQUESTS.labels(name, "miss") if name else None
+    
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._miss()
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._miss()
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if self._hit_metric:
+            self._hit_metric.inc()
+        return value
+    
+    def _miss(self) -> None:
+        self.misses += 1
+        if self._miss_metric:
+            self._miss_metric.inc()
+    
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full."""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry."""
+        self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class BloomFilter:
+    """Probabilistic set: no false negatives, false positives at about error_rate."""
+    
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        # Double hashing derives every position from two 64-bit halves
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+    
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+    
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class CacheInvalidationBus:
+    """Broadcasts cache invalidations to other API nodes.
+    
+    Invalidations are appended to a small capped collection that every node
+    tails; each node applies the ones published by its peers.
+    
+    ObjectIds minted on different nodes do not follow the collection's
+    insertion order, so a re-opened cursor cannot resume from the last _id.
+    It re-reads the collection in natural order and skips the entries
+    already seen, remembering as many ids as the collection can hold.
+    """
+    
+    collection_name = "cache_invalidations"
+    max_entries = 10000
+    
+    def __init__(self, enabled: bool = settings.CACHE_BROADCAST_ENABLED):
+        self.enabled = enabled
+        self.node_id = uuid.uuid4().hex
+        self._handlers: Dict[str, Callable[[str], None]] = {}
+        self._collection = None
+        self._task: Optional[asyncio.Task] = None
+        self._seen_order: Deque[Any] = deque()
+        self._seen: Set[Any] = set()
+    
+    def register(self, namespace: str, handler: Callable[[str], None]) -> None:
+        """Register the callback that invalidates a key of the given namespace."""
+        self._handlers[namespace] = handler
+    
+    async def publish(self, namespace: str, key: str) -> None:
+        """Tell the other nodes to drop key from the given namespace."""
+        if self._collection is None:
+            return
+        
+        try:
+            await self._collection.insert_one({
+                "namespace": namespace,
+                "key": key,
+                "node": self.node_id,
+                "created_at": datetime.utcnow()
+            })
+        except PyMongoError as e:
+            logger.warning("Could not broadcast cache invalidation: %s", e)
+    
+    async def start(self, database: Any) -> None:
+        """Create the capped collection if needed and start tailing it."""
+        if not self.enabled or self._task is not None:
+            return
+        
+        try:
+            await database.create_collection(
+                self.collection_name, capped=True, size=1024 * 1024, max=self.max_entries
+            )
+        except CollectionInvalid:
+            pass
+        
+        self._collection = database[self.collection_name]
+        self._task = asyncio.create_task(self._tail(), name="cache-invalidation-bus")
+    
+    async def stop(self) -> None:
+        """Stop tailing the collection."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._collection = None
+    
+    def _remember(self, document_id: Any) -> bool:
+        """Record an entry as seen; False if it already was."""
+        if document_id in self._seen:
+            return False
+        
+        self._seen.add(document_id)
+        self._seen_order.append(document_id)
+        # Entries older than the collection's capacity can no longer be read back
+        if len(self._seen_order) > self.max_entries:
+            self._seen.discard(self._seen_order.popleft())
+        return True
+    
+    async def _tail(self) -> None:
+        # Only invalidations published after startup are relevant
+        async for document in self._collection.find({}, {"_id": 1}):
+            self._remember(document["_id"])
+        
+        while True:
+            cursor = self._collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT)
+            try:
+                async for document in cursor:
+                    if not self._remember(document["_id"]) or document.get("node") == self.node_id:
+                        continue
+                    handler = self._handlers.get(document.get("namespace"))
+                    if handler:
+                        handler(document.get("key"))
+            except PyMongoError as e:
+                logger.warning("Cache invalidation cursor lost: %s", e)
+            
+            # The tailable cursor dies when the collection is empty or on errors
+            await asyncio.sleep(1)
+
+
+cache_invalidation_bus = CacheInvalidationBus()
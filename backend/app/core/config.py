@@ -1,5 +1,6 @@
+import os
 from functools import lru_cache
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import AnyHttpUrl, validator
 from pydantic_settings import BaseSettings
@@ -18,10 +19,30 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 10080  # 7 days
     ALGORITHM: str = "HS256"
+    # Embed role/status/token version in access tokens so role checks skip MongoDB
+    STATELESS_AUTH_ENABLED: bool = False
+    STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES: int = 5
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = 30.0
+    # Revoked refresh tokens are screened by an in-memory Bloom filter
+    TOKEN_REVOCATION_FILTER_REBUILD_SECONDS: float = 60.0
+    TOKEN_REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    # bcrypt runs in a dedicated executor; threads suffice since bcrypt releases the GIL
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 5.0
+    PASSWORD_HASH_USE_PROCESSES: bool = False
 
     # Database settings
     MONGODB_URL: str = "mongodb://localhost:27017"
     DATABASE_NAME: str = "btg_funds_db"
+    # Multi-document transactions require a replica set or sharded cluster
+    MONGODB_TRANSACTIONS_ENABLED: bool = False
+    # "decimal128" (COP as Decimal128) or "minor_units" (int64 cents); minor_units cannot be undone
+    MONEY_STORAGE: str = "decimal128"
+    # Convert existing Decimal128 amounts in the background at startup
+    MONEY_MIGRATE_ON_STARTUP: bool = False
+    # Warn when one request issues more MongoDB commands than this (0 disables)
+    MONGODB_QUERY_BUDGET: int = 20
 
     # AWS Configuration
     AWS_REGION: str = "us-east-1"
@@ -34,6 +55,13 @@ class Settings(BaseSettings):
     SMTP_USERNAME: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     EMAIL_FROM: str = "noreply@btgpactual.com"
+    # Implicit TLS uses SMTP_TLS_PORT; otherwise SMTP_PORT with STARTTLS when offered
+    SMTP_USE_TLS: bool = True
+    SMTP_TLS_PORT: int = 465
+    SMTP_POOL_SIZE: int = 4
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_POOL_IDLE_TIMEOUT_SECONDS: float = 60.0
+    SMTP_POOL_HEALTH_CHECK_SECONDS: float = 15.0
 
     # Gmail SMTP Configuration (Free Tier)
     GMAIL_SMTP_USER: Optional[str] = None
@@ -44,6 +72,27 @@ class Settings(BaseSettings):
     TWILIO_AUTH_TOKEN: Optional[str] = None
     TWILIO_FROM_PHONE: Optional[str] = None
     TWILIO_PHONE_NUMBER: Optional[str] = None
+    SMS_TIMEOUT_SECONDS: float = 10.0
+    SMS_MAX_CONNECTIONS: int = 10
+
+    # In-process caches
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    FUND_CATALOG_CHECK_SECONDS: float = 5.0
+    TRANSACTION_COUNT_CACHE_TTL_SECONDS: float = 15.0
+    TRANSACTION_COUNT_CACHE_MAX_SIZE: int = 10000
+    TRANSACTION_EXPORT_BATCH_SIZE: int = 500
+    # Invalidate peer caches through a capped collection (multi-node deployments)
+    CACHE_BROADCAST_ENABLED: bool = False
+
+    # Notification outbox workers
+    NOTIFICATION_WORKERS: int = 2
+    NOTIFICATION_MAX_ATTEMPTS: int = 5
+    NOTIFICATION_RETRY_BASE_SECONDS: float = 2.0
+    NOTIFICATION_RETRY_MAX_SECONDS: float = 300.0
+    NOTIFICATION_POLL_INTERVAL_SECONDS: float = 1.0
+    NOTIFICATION_LEASE_SECONDS: int = 60
 
     # Test Configuration
     TEST_PHONE_NUMBER: Optional[str] = None
@@ -53,7 +102,22 @@ class Settings(BaseSettings):
 
     # Logging
     LOG_LEVEL: str = "INFO"
-    LOG_FORMAT: str = "json"
+    LOG_FORMAT: str = "json"  # "json" or "text"
+    LOG_FILE: Optional[str] = None  # Rotating log file, disabled when unset
+    LOG_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_FILE_BACKUP_COUNT: int = 5
+    # Share of successful requests written to the access log, per route template
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_SAMPLE_RATES: Dict[str, float] = {"/health": 0.01}
+
+    # Tracing
+    TRACING_ENABLED: bool = False
+    # Share of traces recorded, decided when the root span starts
+    TRACING_SAMPLE_RATE: float = 0.05
+    TRACING_EXPORTER: str = "jsonl"  # "jsonl" or "otlp"
+    TRACING_JSONL_PATH: str = "traces.jsonl"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_MAX_QUEUE_SIZE: int = 2048
 
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = [
@@ -1,14 +1,35 @@
 import asyncio
-from typing import Optional
-from motor.motor_asyncio import AsyncIOMotorClient
+import logging
+from typing import Optional, Callable, Awaitable, TypeVar
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
 from beanie import init_beanie
+from pymongo import ReadPreference
+from pymongo.read_concern import ReadConcern
+from pymongo.write_concern import WriteConcern
 
 from app.core.config import settings
-from app.models import User, Fund, Transaction, UserFundSubscription, DEFAULT_FUNDS
+from app.core.money import MINOR_UNITS_STORAGE, check_storage_mode, migrate_to_minor_units
+from app.core.query_monitor import command_monitor
+from app.models import (
+    User,
+    Fund,
+    Transaction,
+    UserFundSubscription,
+    NotificationOutbox,
+    RevokedToken,
+    DEFAULT_FUNDS
+)
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 
 class Database:
     client: Optional[AsyncIOMotorClient] = None
+    transactions_enabled: bool = False
+    migration_task: Optional[asyncio.Task] = None
 
 
 db = Database()
@@ -16,25 +37,81 @@ db = Database()
 
 async def connect_to_mongo():
     """Create database connection."""
-    db.client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db.client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[command_monitor])
     
     # Initialize beanie with the database
     await init_beanie(
         database=db.client[settings.DATABASE_NAME],
-        document_models=[User, Fund, Transaction, UserFundSubscription]
+        document_models=[
+            User,
+            Fund,
+            Transaction,
+            UserFundSubscription,
+            NotificationOutbox,
+            RevokedToken
+        ]
     )
     
-    print(f"Connected to MongoDB: {settings.DATABASE_NAME}")
+    logger.info("Connected to MongoDB: %s", settings.DATABASE_NAME)
+    
+    # Before anything writes an amount in the configured representation
+    await check_storage_mode(db.client[settings.DATABASE_NAME])
+    
+    if settings.MONGODB_TRANSACTIONS_ENABLED:
+        db.transactions_enabled = await supports_transactions()
+        if not db.transactions_enabled:
+            logger.warning("MongoDB deployment is not a replica set; transactions disabled")
     
     # Initialize default funds
     await initialize_default_data()
+    
+    if MINOR_UNITS_STORAGE and settings.MONEY_MIGRATE_ON_STARTUP:
+        db.migration_task = asyncio.create_task(_migrate_money(), name="money-migration")
+
+
+async def _migrate_money():
+    """Convert remaining Decimal128 amounts while the API keeps serving."""
+    try:
+        converted = await migrate_to_minor_units(db.client[settings.DATABASE_NAME])
+        logger.info("Money migration converted %d documents to minor units", converted)
+    except Exception:
+        logger.exception("Money migration failed")
 
 
 async def close_mongo_connection():
     """Close database connection."""
+    if db.migration_task:
+        db.migration_task.cancel()
+        await asyncio.gather(db.migration_task, return_exceptions=True)
+        db.migration_task = None
+    
     if db.client:
         db.client.close()
-        print("Disconnected from MongoDB")
+        logger.info("Disconnected from MongoDB")
+
+
+async def supports_transactions() -> bool:
+    """Check whether the connected deployment supports multi-document transactions."""
+    hello = await db.client.admin.command("hello")
+    return bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+
+
+async def run_in_transaction(
+    callback: Callable[[AsyncIOMotorClientSession], Awaitable[T]]
+) -> T:
+    """Run callback inside a multi-document transaction.
+    
+    with_transaction retries the whole callback on TransientTransactionError
+    and the commit on UnknownTransactionCommitResult; any other exception
+    aborts the transaction and is re-raised.
+    """
+    async with await db.client.start_session() as session:
+        return await session.with_transaction(
+            callback,
+            read_concern=ReadConcern("snapshot"),
+            write_concern=WriteConcern("majority"),
+            read_preference=ReadPreference.PRIMARY
+        )
 
 
 async def initialize_default_data():
@@ -43,25 +120,27 @@ async def initialize_default_data():
         # Initialize default funds
         existing_funds = await Fund.find_all().to_list()
         if not existing_funds:
-            print("Initializing default funds...")
+            logger.info("Initializing default funds...")
             for fund_data in DEFAULT_FUNDS:
                 fund = Fund(**fund_data)
                 await fund.insert()
-            print("Default funds created successfully")
+            from app.repositories.fund_repository import fund_repository
+            await fund_repository.catalog.bump_version()
+            logger.info("Default funds created successfully")
         
         # Create default admin user if it doesn't exist
         admin_email = "admin@btgpactual.com"
         existing_admin = await User.find_one(User.email == admin_email)
         
         if not existing_admin:
-            print("Creating default admin user...")
+            logger.info("Creating default admin user...")
             from app.core.security import security
             from app.models import UserRole, NotificationPreference
             from decimal import Decimal
             
             admin_user = User(
                 email=admin_email,
-                hashed_password=security.get_password_hash("Admin123!"),
+                hashed_password=await security.get_password_hash_async("Admin123!"),
                 full_name="BTG Pactual Administrator",
                 role=UserRole.ADMIN,
                 is_active=True,
@@ -69,11 +148,11 @@ async def initialize_default_data():
                 current_balance=Decimal("1000000")  # COP $1.000.000 for admin
             )
             await admin_user.insert()
-            print(f"Default admin user created: {admin_email}")
-            print("Default admin password: Admin123!")
+            logger.info("Default admin user created: %s", admin_email)
+            logger.info("Default admin password: Admin123!")
         
-    except Exception as e:
-        print(f"Error initializing default data: {str(e)}")
+    except Exception:
+        logger.exception("Error initializing default data")
 
 
 async def get_database():
@@ -2,12 +2,15 @@ import json
 from decimal import Decimal
 from datetime import datetime
 from bson import ObjectId, Decimal128
-from typing import Any
+from typing import Any, Callable, Dict
+
+import orjson
+from fastapi.responses import JSONResponse
 
 
 class CustomJSONEncoder(json.JSONEncoder):
     """Custom JSON encoder for MongoDB and Pydantic compatibility"""
-    
+
     def default(self, o: Any) -> Any:
         if isinstance(o, ObjectId):
             return str(o)
@@ -18,3 +21,60 @@ class CustomJSONEncoder(json.JSONEncoder):
         elif isinstance(o, datetime):
             return o.isoformat()
         return super().default(o)
+
+
+def _decimal_to_float(value: Decimal) -> float:
+    # orjson writes NaN and Infinity as null; the stdlib encoder refused them
+    if not value.is_finite():
+        raise ValueError("Out of range float values are not JSON compliant")
+    return float(value)
+
+
+# Exact-type lookup first; subclasses fall back to the isinstance chain
+_ORJSON_ENCODERS: Dict[type, Callable[[Any], Any]] = {
+    Decimal: _decimal_to_float,
+    ObjectId: str,
+    Decimal128: str,
+}
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _orjson_default(o: Any) -> Any:
+    encoder = _ORJSON_ENCODERS.get(type(o))
+    if encoder is not None:
+        return encoder(o)
+
+    for cls, encoder in _ORJSON_ENCODERS.items():
+        if isinstance(o, cls):
+            return encoder(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to the same compact UTF-8 JSON as CustomJSONEncoder.
+
+    datetimes are handled natively by orjson and render like isoformat().
+    Floats only differ in exponent notation (1e16 vs 1e+16), which money
+    amounts never reach. Content orjson rejects, such as integers wider
+    than 64 bits, goes through the stdlib encoder instead, so a NaN or
+    infinite Decimal still raises ValueError as it always did.
+    """
+    try:
+        return orjson.dumps(content, default=_orjson_default, option=ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(",", ":"),
+            cls=CustomJSONEncoder,
+        ).encode("utf-8")
+
+
+class CustomJSONResponse(JSONResponse):
+    """JSON response rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,128 @@
+import logging
+import queue
+import random
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from bson import ObjectId
+from pythonjsonlogger import jsonlogger
+
+from app.core.config import settings
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+JSON_FORMAT = "%(asctime)s %(name)s %(levelname)s %(message)s"
+
+_listener: Optional[QueueListener] = None
+
+
+# Arguments of these types cannot change before the listener formats them
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None), bytes, Decimal, datetime, date, UUID, ObjectId)
+
+_exception_formatter = logging.Formatter()
+
+
+def _immutable_args(args: Any) -> bool:
+    # A lone dict argument becomes the args mapping itself, which is mutable
+    return isinstance(args, tuple) and all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in args)
+
+
+class _LazyQueueHandler(QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread.
+
+    The stock prepare() merges args into the message and renders the
+    traceback on the calling thread so records can be pickled. The queue
+    here never leaves the process, so records whose args are immutable are
+    enqueued untouched. Anything else, such as a dict or a model, is merged
+    right away, since the caller may change it before the listener runs.
+    Tracebacks are always rendered here so they do not keep frames alive.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args and not _immutable_args(record.args):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class AccessLogSampler:
+    """Decides which requests are written to the access log.
+
+    Error responses are always logged; successful ones are kept with the
+    probability configured for their route template.
+    """
+
+    def __init__(self, default_rate: float, rates: Dict[str, float]):
+        self.default_rate = default_rate
+        self.rates = rates
+
+    def should_log(self, route: str, status_code: int) -> bool:
+        if status_code >= 400:
+            return True
+
+        rate = self.rates.get(route, self.default_rate)
+        if rate >= 1:
+            return True
+        return rate > 0 and random.random() < rate
+
+
+access_log_sampler = AccessLogSampler(
+    settings.ACCESS_LOG_SAMPLE_RATE,
+    settings.ACCESS_LOG_SAMPLE_RATES
+)
+
+
+def _build_formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT.lower() == "json":
+        return jsonlogger.JsonFormatter(JSON_FORMAT)
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def setup_logging() -> None:
+    """Route every log record through a queue drained by a background thread.
+
+    Formatting (JSON or text, per LOG_FORMAT) and the console/rotating file
+    writes happen on the listener thread, never on the event loop.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = _build_formatter()
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+    if settings.LOG_FILE:
+        handlers.append(RotatingFileHandler(
+            settings.LOG_FILE,
+            maxBytes=settings.LOG_FILE_MAX_BYTES,
+            backupCount=settings.LOG_FILE_BACKUP_COUNT,
+            encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [_LazyQueueHandler(log_queue)]
+    root.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+
+    # Configure specific loggers
+    logging.getLogger("uvicorn.access").disabled = True  # Access logs come from LoggingMiddleware
+    logging.getLogger("motor").setLevel(logging.WARNING)  # Reduce MongoDB logs
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,127 @@
+import functools
+import os
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+from fastapi import HTTPException, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+# With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to a shared empty
+# directory before startup; every process then writes its samples there and
+# /metrics aggregates them.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"]
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum"
+)
+FUND_OPERATIONS = Counter(
+    "fund_operations_total",
+    "Fund subscriptions and cancellations by outcome",
+    ["operation", "outcome"]
+)
+NOTIFICATION_SEND_DURATION = Histogram(
+    "notification_send_duration_seconds",
+    "Notification delivery latency by channel",
+    ["channel", "result"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+# Hit ratio = rate(hit) / rate(hit + miss), summed over processes
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "In-process cache lookups by result",
+    ["cache", "result"]
+)
+MONGODB_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection and command",
+    ["collection", "command", "result"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+TRACE_EXPORT_FAILURES = Counter(
+    "trace_export_failures_total",
+    "Span batches the tracing exporter failed to send"
+)
+MONGODB_COMMANDS_PER_REQUEST = Histogram(
+    "http_request_mongodb_commands",
+    "MongoDB commands issued while serving one request, by route template",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+)
+
+
+def count_outcomes(operation: str) -> Callable[[F], F]:
+    """Count a fund operation as success, rejected (4xx) or error."""
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                result = await func(*args, **kwargs)
+            except HTTPException as e:
+                outcome = "rejected" if e.status_code < 500 else "error"
+                FUND_OPERATIONS.labels(operation, outcome).inc()
+                raise
+            except Exception:
+                FUND_OPERATIONS.labels(operation, "error").inc()
+                raise
+            FUND_OPERATIONS.labels(operation, "success").inc()
+            return result
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def time_notification(channel: str) -> Callable[[F], F]:
+    """Observe the latency of a send method returning whether it succeeded."""
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start_time = time.perf_counter()
+            sent = False
+            try:
+                sent = await func(*args, **kwargs)
+                return sent
+            finally:
+                NOTIFICATION_SEND_DURATION.labels(
+                    channel, "success" if sent else "failure"
+                ).observe(time.perf_counter() - start_time)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def metrics_response() -> Response:
+    """Render every metric in the Prometheus text format."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,42 +1,190 @@
 import logging
 import time
-from typing import Callable
-from fastapi import Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-logger = logging.getLogger("btg_pactual")
+from app.core.config import settings
+from app.core.logging_config import access_log_sampler
+from app.core.metrics import (
+    HTTP_IN_FLIGHT,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    MONGODB_COMMANDS_PER_REQUEST,
+)
+from app.core.query_monitor import RequestQueries, current_request_queries
+from app.core.tracing import SPAN_KIND_SERVER, tracer
 
+logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("btg_pactual.access")
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware para logging de requests y responses."""
+
+class LoggingMiddleware:
+    """Middleware ASGI para logging de requests y responses.
+    
+    Pure ASGI instead of BaseHTTPMiddleware: no extra task or memory stream
+    per request, and streaming responses pass through unbuffered.
+    X-Process-Time is the time until the response starts. One access log
+    line is written once the body has been sent, subject to per-route
+    sampling.
+    """
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Log request
-        logger.info(
-            f"Request: {request.method} {request.url.path} - "
-            f"Client: {request.client.host if request.client else 'unknown'}"
-        )
+        start_time = time.perf_counter()
+        status_code = 500
         
-        # Process request
-        response = await call_next(request)
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(time.perf_counter() - start_time))
+            await send(message)
         
-        # Calculate processing time
-        process_time = time.time() - start_time
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Calculate processing time
+            process_time = time.perf_counter() - start_time
+            
+            # The router leaves the matched route in the scope
+            route = getattr(scope.get("route"), "path", scope["path"])
+            if access_logger.isEnabledFor(logging.INFO) and access_log_sampler.should_log(route, status_code):
+                client = scope.get("client")
+                # Arguments are only merged into the message on the logging thread
+                access_logger.info(
+                    "%s %s - Status: %s - Time: %.4fs",
+                    scope["method"], scope["path"], status_code, process_time,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": route,
+                        "status_code": status_code,
+                        "duration_ms": round(process_time * 1000, 3),
+                        "client": client[0] if client else "unknown"
+                    }
+                )
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que registra latencia, códigos de estado y requests en curso."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Log response
-        logger.info(
-            f"Response: {request.method} {request.url.path} - "
-            f"Status: {response.status_code} - "
-            f"Time: {process_time:.4f}s"
-        )
+        start_time = time.perf_counter()
+        status_code = 500
         
-        # Add processing time header
-        response.headers["X-Process-Time"] = str(process_time)
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # Route templates keep label cardinality bounded; unmatched paths share one label
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start_time)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+
+
+class QueryMonitorMiddleware:
+    """Middleware ASGI que cuenta los comandos MongoDB de cada request.
+    
+    Commands are attributed through a context variable read by the pymongo
+    command listener. A request exceeding MONGODB_QUERY_BUDGET is logged
+    with its most repeated commands, which points at N+1 query patterns.
+    """
+    
+    def __init__(self, app: ASGIApp, budget: int = settings.MONGODB_QUERY_BUDGET):
+        self.app = app
+        self.budget = budget
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        return response
+        queries = RequestQueries()
+        token = current_request_queries.set(queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request_queries.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            count = queries.count
+            MONGODB_COMMANDS_PER_REQUEST.labels(method, route).observe(count)
+            if 0 < self.budget < count:
+                logger.warning(
+                    "%s %s issued %d MongoDB commands (budget %d, %.1fms): %s",
+                    method, scope["path"], count, self.budget,
+                    queries.duration * 1000, queries.most_repeated(),
+                    extra={
+                        "route": route,
+                        "query_count": count,
+                        "query_budget": self.budget,
+                        "query_duration_ms": round(queries.duration * 1000, 3)
+                    }
+                )
+
+
+class TracingMiddleware:
+    """Middleware ASGI que abre el span raíz de cada request.
+    
+    An incoming W3C traceparent header continues the caller's trace and
+    its sampling decision; otherwise the request is sampled at
+    TRACING_SAMPLE_RATE.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+        
+        with tracer.start_span("HTTP", SPAN_KIND_SERVER, traceparent) as span:
+            if span is None:
+                await self.app(scope, receive, send)
+                return
+            
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.attributes["http.status_code"] = message["status"]
+                await send(message)
+            
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                span.name = f"{scope['method']} {route}"
+                span.attributes["http.method"] = scope["method"]
+                span.attributes["http.route"] = route
 
 
 def setup_cors(app) -> None:
@@ -56,33 +204,34 @@ def setup_cors(app) -> None:
     )
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Middleware para añadir headers de seguridad."""
+SECURITY_HEADERS = [
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+]
+SECURITY_HEADER_NAMES = {name for name, _ in SECURITY_HEADERS}
+
+
+class SecurityHeadersMiddleware:
+    """Middleware ASGI para añadir headers de seguridad."""
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        response = await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Security headers, replacing any set by the endpoint
+                message["headers"] = [
+                    (name, value) for name, value in message.get("headers", [])
+                    if name.lower() not in SECURITY_HEADER_NAMES
+                ] + SECURITY_HEADERS
+            await send(message)
         
-        return response
-
-
-def setup_logging():
-    """Configure application logging."""
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler("btg_pactual.log", encoding="utf-8")
-        ]
-    )
-    
-    # Configure specific loggers
-    logging.getLogger("uvicorn.access").disabled = True  # Disable uvicorn access logs
-    logging.getLogger("motor").setLevel(logging.WARNING)  # Reduce MongoDB logs
+        await self.app(scope, receive, send_wrapper)
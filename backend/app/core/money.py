@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Union
+
+from bson import Decimal128
+from pydantic import GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Amounts are stored as integer cents of COP in minor units mode
+MINOR_UNITS = 100
+
+MINOR_UNITS_STORAGE = settings.MONEY_STORAGE == "minor_units"
+
+# Written once amounts may be stored as minor units; see check_storage_mode
+STORAGE_MARKER_COLLECTION = "app_metadata"
+STORAGE_MARKER_ID = "money_storage"
+
+# Every monetary field, by collection, that the migration converts
+MONEY_FIELDS: Dict[str, List[str]] = {
+    "users": ["current_balance"],
+    "funds": ["minimum_amount"],
+    "transactions": ["amount"],
+    "user_fund_subscriptions": ["subscription_amount"],
+    "notification_outbox": ["amount", "balance"],
+}
+
+
+@dataclass(frozen=True, order=True)
+class Money:
+    """An exact COP amount held as integer minor units."""
+
+    minor: int
+
+    @classmethod
+    def from_decimal(cls, amount: Union[Decimal, int, str]) -> "Money":
+        """Convert a COP amount, rejecting fractions smaller than a cent."""
+        minor = Decimal(amount) * MINOR_UNITS
+        if minor != minor.to_integral_value():
+            raise InvalidOperation(f"{amount} has more precision than {MINOR_UNITS} minor units")
+        return cls(int(minor))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.minor) / MINOR_UNITS
+
+    def __add__(self, other: "Money") -> "Money":
+        return Money(self.minor + other.minor)
+
+    def __sub__(self, other: "Money") -> "Money":
+        return Money(self.minor - other.minor)
+
+    def __neg__(self) -> "Money":
+        return Money(-self.minor)
+
+
+def parse_amount(value: Any) -> Any:
+    """Validator body shared by every monetary field.
+
+    Decimal128 values always hold COP. Integers read back from the
+    database are minor units when MONEY_STORAGE is minor_units, so during
+    the migration both representations load to the same Decimal.
+    """
+    if isinstance(value, Decimal128):
+        return value.to_decimal()
+    if isinstance(value, int) and not isinstance(value, bool) and MINOR_UNITS_STORAGE:
+        return Money(value).to_decimal()
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+    return value
+
+
+class Amount(Decimal):
+    """Field annotation for monetary values.
+    
+    Values are plain Decimals; the type only carries parse_amount into the
+    field's own schema, so documents, response schemas and projections all
+    read stored amounts without per-model validators.
+    """
+    
+    @classmethod
+    def __get_pydantic_core_schema__(
+        cls, source: Any, handler: GetCoreSchemaHandler
+    ) -> core_schema.CoreSchema:
+        return core_schema.no_info_before_validator_function(parse_amount, handler(Decimal))
+
+
+def to_storage(amount: Decimal) -> Union[int, Decimal128]:
+    """Encode an amount for queries and updates in the configured representation."""
+    if MINOR_UNITS_STORAGE:
+        return Money.from_decimal(amount).minor
+    return Decimal128(amount)
+
+
+# Beanie Settings.bson_encoders for documents with monetary fields
+BSON_ENCODERS = {Decimal: to_storage} if MINOR_UNITS_STORAGE else {}
+
+
+def minor_units_expr(field: str) -> dict:
+    """Aggregation expression reading a field as minor units whatever its stored type."""
+    path = f"${field}"
+    return {
+        "$cond": [
+            {"$in": [{"$type": path}, ["decimal", "double"]]},
+            {"$toLong": {"$round": [{"$multiply": [path, MINOR_UNITS]}, 0]}},
+            path
+        ]
+    }
+
+
+async def check_storage_mode(database: Any) -> None:
+    """Record minor units storage, or refuse decimal128 mode after it was used.
+
+    Integers are read as cents only in minor units mode, so starting in
+    decimal128 mode over converted documents would inflate every amount
+    a hundredfold.
+    """
+    markers = database[STORAGE_MARKER_COLLECTION]
+    if MINOR_UNITS_STORAGE:
+        await markers.update_one(
+            {"_id": STORAGE_MARKER_ID},
+            {"$set": {"mode": "minor_units"}, "$setOnInsert": {"since": datetime.utcnow()}},
+            upsert=True
+        )
+        return
+
+    marker = await markers.find_one({"_id": STORAGE_MARKER_ID})
+    if marker and marker.get("mode") == "minor_units":
+        raise RuntimeError(
+            f"Amounts in this database may be stored as minor units since {marker.get('since')}; "
+            "start with MONEY_STORAGE=minor_units"
+        )
+
+
+async def migrate_to_minor_units(database: Any, batch_size: int = 500) -> int:
+    """Convert stored Decimal128 amounts to minor units, batch by batch.
+
+    Each document is rewritten atomically with an update pipeline, so the
+    API keeps serving (and writing) while it runs. Returns the number of
+    documents converted.
+    """
+    converted = 0
+    for collection_name, fields in MONEY_FIELDS.items():
+        collection = database[collection_name]
+        pending = {"$or": [{field: {"$type": ["decimal", "double"]}} for field in fields]}
+
+        while True:
+            ids = [
+                document["_id"]
+                async for document in collection.find(pending, {"_id": 1}).limit(batch_size)
+            ]
+            if not ids:
+                break
+
+            result = await collection.update_many(
+                {"_id": {"$in": ids}},
+                [{"$set": {field: minor_units_expr(field) for field in fields}}]
+            )
+            converted += result.modified_count
+            # Yield between batches so request handling is not starved
+            await asyncio.sleep(0)
+
+        logger.info("Money migration finished for %s", collection_name)
+
+    return converted
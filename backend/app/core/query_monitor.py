@@ -0,0 +1,96 @@
+import logging
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from pymongo import monitoring
+
+from app.core.metrics import MONGODB_COMMAND_DURATION
+
+logger = logging.getLogger(__name__)
+
+# The collection name of a getMore lives under this key, not under the command name
+_CURSOR_COMMANDS = {"getMore": "collection", "killCursors": "killCursors"}
+
+
+class RequestQueries:
+    """MongoDB commands issued on behalf of a single request.
+
+    Motor runs pymongo on executor threads with a copy of the caller's
+    context, so commands from concurrent awaits of one request may be
+    recorded from several threads at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands: Counter = Counter()
+        self.duration = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self.commands.values())
+
+    def record(self, collection: str, command: str) -> None:
+        with self._lock:
+            self.commands[f"{collection}.{command}"] += 1
+
+    def add_duration(self, seconds: float) -> None:
+        with self._lock:
+            self.duration += seconds
+
+    def most_repeated(self, limit: int = 3) -> str:
+        """Render the most frequent commands, e.g. 'users.find x12'."""
+        return ", ".join(
+            f"{name} x{count}" for name, count in self.commands.most_common(limit)
+        )
+
+
+current_request_queries: ContextVar[Optional[RequestQueries]] = ContextVar(
+    "current_request_queries", default=None
+)
+
+
+def _collection_of(event: monitoring.CommandStartedEvent) -> str:
+    command = event.command
+    key = _CURSOR_COMMANDS.get(event.command_name, event.command_name)
+    collection = command.get(key) if command else None
+    # Database-level commands (hello, ping, aggregate: 1) carry no collection
+    return collection if isinstance(collection, str) else "none"
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Times every MongoDB command and attributes it to the current request.
+
+    pymongo calls the listener synchronously on the thread that issued the
+    command, so it only does dictionary and counter updates.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[object, int], Tuple[str, Optional[RequestQueries]]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = _collection_of(event)
+        queries = current_request_queries.get()
+        if queries is not None:
+            queries.record(collection, event.command_name)
+        self._pending[(event.connection_id, event.request_id)] = (collection, queries)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, "success")
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, "failure")
+
+    def _finish(self, event, result: str) -> None:
+        pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        collection, queries = pending
+        seconds = event.duration_micros / 1_000_000
+        MONGODB_COMMAND_DURATION.labels(collection, event.command_name, result).observe(seconds)
+        if queries is not None:
+            queries.add_duration(seconds)
+
+
+command_monitor = CommandMonitor()
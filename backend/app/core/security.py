@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any, Union
+from typing import Optional, Any, Union, Callable
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -7,12 +12,100 @@ from fastapi import HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import Request
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _hash_password(password: str) -> str:
+    # Module-level so it can be pickled into a process pool
+    return pwd_context.hash(password)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification in a dedicated executor.
+
+    At most max_pending operations may be running or queued; callers that
+    cannot get a slot within queue_timeout get a 503 instead of piling up.
+    """
+
+    def __init__(
+        self,
+        workers: int = settings.PASSWORD_HASH_WORKERS,
+        max_pending: int = settings.PASSWORD_HASH_MAX_PENDING,
+        queue_timeout: float = settings.PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS,
+        use_processes: bool = settings.PASSWORD_HASH_USE_PROCESSES
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service busy, please retry"
+            )
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        """Generate password hash off the event loop."""
+        return await self._run(_hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash off the event loop."""
+        return await self._run(_verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        """Release the executor workers."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
+
+
 class Security:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = pwd_context
     security = HTTPBearer()
+    optional_security = HTTPBearer(auto_error=False)
+    # Verified payloads keyed by token digest, each kept until the token's exp
+    _token_cache: TTLCache[dict] = TTLCache(
+        maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+        ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        name="tokens"
+    )
 
     @classmethod
     def verify_password(cls, plain_password: str, hashed_password: str) -> bool:
@@ -24,13 +117,24 @@ class Security:
         """Generate password hash."""
         return cls.pwd_context.hash(password)
 
+    @classmethod
+    async def verify_password_async(cls, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop."""
+        return await password_hasher.verify(plain_password, hashed_password)
+
+    @classmethod
+    async def get_password_hash_async(cls, password: str) -> str:
+        """Generate password hash without blocking the event loop."""
+        return await password_hasher.hash(password)
+
     @classmethod
     def create_access_token(
         cls, 
         subject: Union[str, Any], 
-        expires_delta: Optional[timedelta] = None
+        expires_delta: Optional[timedelta] = None,
+        claims: Optional[dict] = None
     ) -> str:
-        """Create access token."""
+        """Create access token, optionally embedding extra claims."""
         if expires_delta:
             expire = datetime.utcnow() + expires_delta
         else:
@@ -44,6 +148,8 @@ class Security:
             "sub": str(subject),
             "type": "access"
         }
+        if claims:
+            to_encode.update(claims)
         
         encoded_jwt = jwt.encode(
             to_encode, 
@@ -70,7 +176,8 @@ class Security:
             "exp": expire,
             "iat": datetime.utcnow(),
             "sub": str(subject),
-            "type": "refresh"
+            "type": "refresh",
+            "jti": uuid.uuid4().hex
         }
         
         encoded_jwt = jwt.encode(
@@ -82,24 +189,54 @@ class Security:
 
     @classmethod
     def decode_token(cls, token: str) -> dict:
-        """Decode and validate token."""
+        """Decode and validate token.
+        
+        Verified payloads are cached until the token expires, so repeated
+        requests with the same bearer token skip signature verification.
+        The returned dict is shared and must not be modified.
+        """
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        payload = cls._token_cache.get(key)
+        if payload is not None:
+            return payload
+        
         try:
             payload = jwt.decode(
                 token, 
                 settings.SECRET_KEY, 
                 algorithms=[settings.ALGORITHM]
             )
-            return payload
         except JWTError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Could not validate credentials",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        
+        ttl = payload.get("exp", 0) - time.time()
+        if ttl > 0:
+            cls._token_cache.set(key, payload, ttl=ttl)
+        return payload
+
+    @classmethod
+    def token_cache_stats(cls) -> dict:
+        """Hit/miss counters of the decoded token cache."""
+        return {
+            "size": len(cls._token_cache),
+            "hits": cls._token_cache.hits,
+            "misses": cls._token_cache.misses,
+            "hit_ratio": cls._token_cache.hit_ratio
+        }
 
     @classmethod
     def get_current_user_id(cls, credentials: HTTPAuthorizationCredentials) -> str:
         """Get current user ID from token."""
+        payload = cls.get_access_token_payload(credentials)
+        return str(payload["sub"])
+
+    @classmethod
+    def get_access_token_payload(cls, credentials: HTTPAuthorizationCredentials) -> dict:
+        """Validate an access token and return its claims."""
         token = credentials.credentials
         payload = cls.decode_token(token)
         
@@ -120,7 +257,7 @@ class Security:
                 headers={"WWW-Authenticate": "Bearer"},
             )
             
-        return str(user_id)
+        return payload
 
     @classmethod
     def validate_refresh_token(cls, token: str) -> str:
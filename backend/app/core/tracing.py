@@ -0,0 +1,384 @@
+import functools
+import inspect
+import logging
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+import httpx
+
+from app.core.config import settings
+from app.core.json_encoder import dumps
+from app.core.metrics import TRACE_EXPORT_FAILURES
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+T = TypeVar("T")
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+
+_EXPORT_BATCH_SIZE = 256
+_EXPORT_INTERVAL_SECONDS = 1.0
+# While the exporter keeps failing, repeat the warning at most this often
+_FAILURE_LOG_INTERVAL_SECONDS = 60.0
+_STOP = object()
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "attributes",
+        "start_ns", "end_ns", "error", "_start_perf"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._start_perf = time.perf_counter_ns()
+
+    def end(self) -> None:
+        self.end_ns = self.start_ns + time.perf_counter_ns() - self._start_perf
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1_000_000, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+# Marks a trace dropped by head sampling, so nested spans are skipped cheaply
+_NOT_SAMPLED = object()
+
+_current_span: ContextVar[Union[Span, object, None]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Return the active span, or None outside a sampled trace."""
+    span = _current_span.get()
+    return span if isinstance(span, Span) else None
+
+
+class JsonLinesSpanExporter:
+    """Appends one JSON object per finished span to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]) -> None:
+        with open(self.path, "ab") as f:
+            f.write(b"".join(dumps(span.to_dict()) + b"\n" for span in spans))
+
+    def close(self) -> None:
+        pass
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPJsonSpanExporter:
+    """Posts spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, service_name: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.Client(timeout=timeout)
+
+    def _encode(self, span: Span) -> Dict[str, Any]:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in span.attributes.items()
+            ],
+            # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+    def export(self, spans: List[Span]) -> None:
+        body = {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.service_name}}
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "btg_pactual"},
+                "spans": [self._encode(span) for span in spans]
+            }]
+        }]}
+        response = self._client.post(
+            self.endpoint, content=dumps(body), headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+
+    def close(self) -> None:
+        self._client.close()
+
+
+Exporter = Union[JsonLinesSpanExporter, OTLPJsonSpanExporter]
+
+
+class BatchSpanProcessor:
+    """Hands finished spans to the exporter on a background thread.
+
+    Ending a span is a non-blocking put; when the queue is full the span is
+    dropped rather than slowing the request down. Failed batches are
+    counted in trace_export_failures_total; while the collector stays down
+    only the first failure is logged with its traceback.
+    """
+
+    def __init__(self, exporter: Exporter, max_queue_size: int):
+        self.exporter = exporter
+        self.dropped = 0
+        self._failures = 0
+        self._last_failure_log = 0.0
+        self._queue: "queue.Queue[Any]" = queue.Queue(max_queue_size)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + _EXPORT_INTERVAL_SECONDS
+            while len(batch) < _EXPORT_BATCH_SIZE:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: List[Span]) -> None:
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            TRACE_EXPORT_FAILURES.inc()
+            self._failures += 1
+            now = time.monotonic()
+            if self._failures == 1:
+                logger.exception("Failed to export %d spans", len(batch))
+                self._last_failure_log = now
+            elif now - self._last_failure_log >= _FAILURE_LOG_INTERVAL_SECONDS:
+                logger.warning(
+                    "Span export still failing (%d batches so far): %s", self._failures, e
+                )
+                self._last_failure_log = now
+            return
+
+        if self._failures:
+            logger.info("Span export recovered after %d failed batches", self._failures)
+            self._failures = 0
+
+    def shutdown(self) -> None:
+        """Export queued spans and stop the thread."""
+        self._queue.put(_STOP)
+        self._thread.join()
+        self.exporter.close()
+
+
+def _parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Read trace id, parent span id and sampled flag from a W3C traceparent."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+class Tracer:
+    """Creates spans and decides, once per trace, whether it is recorded.
+
+    Sampling is head-based: the root span draws against the sample rate (or
+    follows an incoming traceparent) and every nested span inherits the
+    decision through the context, so unsampled requests only pay for a
+    context variable lookup.
+    """
+
+    def __init__(self, sample_rate: float):
+        self.sample_rate = sample_rate
+        self.processor: Optional[BatchSpanProcessor] = None
+
+    def _sample(self) -> bool:
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        traceparent: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Optional[Span]]:
+        """Run the block inside a child of the active span, or a new trace."""
+        parent = _current_span.get()
+        if parent is _NOT_SAMPLED or self.processor is None:
+            yield None
+            return
+
+        if isinstance(parent, Span):
+            span = Span(name, parent.trace_id, parent.span_id, kind, attributes)
+        else:
+            remote = _parse_traceparent(traceparent)
+            sampled = remote[2] if remote else self._sample()
+            if not sampled:
+                token = _current_span.set(_NOT_SAMPLED)
+                try:
+                    yield None
+                finally:
+                    _current_span.reset(token)
+                return
+            trace_id, parent_id = remote[:2] if remote else (f"{random.getrandbits(128):032x}", None)
+            span = Span(name, trace_id, parent_id, kind, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self.processor.on_end(span)
+
+
+tracer = Tracer(settings.TRACING_SAMPLE_RATE)
+
+
+def traced(name: Optional[str] = None) -> Callable[[F], F]:
+    """Record each call of a coroutine function as a child span.
+
+    Named after the function's qualified name by default. Calls outside an
+    active trace are not recorded, so background loops do not start a trace
+    per poll; they open their own root span per unit of work. With tracing
+    disabled the function is returned unwrapped.
+    """
+    def decorator(func: F) -> F:
+        if not settings.TRACING_ENABLED:
+            return func
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not isinstance(_current_span.get(), Span):
+                return await func(*args, **kwargs)
+            with tracer.start_span(span_name):
+                return await func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def traced_stream(name: str, stream: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Record the whole iteration of an async iterator as a child span.
+
+    For streamed responses, where a traced() coroutine returns before the
+    body is produced. The span is never made current, since the iterator
+    runs in its consumer's context, and nothing is recorded outside a
+    sampled trace.
+    """
+    parent = _current_span.get()
+    processor = tracer.processor
+    if not isinstance(parent, Span) or processor is None:
+        return stream
+
+    async def iterate() -> AsyncIterator[T]:
+        span = Span(name, parent.trace_id, parent.span_id)
+        try:
+            async for item in stream:
+                yield item
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.end()
+            processor.on_end(span)
+    return iterate()
+
+
+def traced_methods(cls: type) -> type:
+    """Apply traced() to every public coroutine method defined on the class."""
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.iscoroutinefunction(value):
+            setattr(cls, attr, traced(f"{cls.__name__}.{attr}")(value))
+    return cls
+
+
+def setup_tracing() -> None:
+    """Start the span exporter configured by TRACING_EXPORTER."""
+    if not settings.TRACING_ENABLED or tracer.processor is not None:
+        return
+
+    exporter: Exporter
+    if settings.TRACING_EXPORTER.lower() == "otlp":
+        exporter = OTLPJsonSpanExporter(settings.TRACING_OTLP_ENDPOINT, settings.PROJECT_NAME)
+    else:
+        exporter = JsonLinesSpanExporter(settings.TRACING_JSONL_PATH)
+    tracer.processor = BatchSpanProcessor(exporter, settings.TRACING_MAX_QUEUE_SIZE)
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and stop the exporter thread."""
+    processor, tracer.processor = tracer.processor, None
+    if processor is not None:
+        processor.shutdown()
+        if processor.dropped:
+            logger.warning("Dropped %d spans with a full export queue", processor.dropped)
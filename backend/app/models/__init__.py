@@ -6,7 +6,9 @@ from decimal import Decimal
 from beanie import Document, Indexed
 from pydantic import BaseModel, Field, validator
 from pymongo import IndexModel, ASCENDING, DESCENDING
-from bson import Decimal128, ObjectId
+from bson import ObjectId
+
+from app.core.money import BSON_ENCODERS, Amount
 
 
 class UserRole(str, Enum):
@@ -36,6 +38,13 @@ class TransactionStatus(str, Enum):
     FAILED = "failed"
 
 
+class OutboxStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SENT = "sent"
+    DEAD_LETTER = "dead_letter"
+
+
 class User(Document):
     """User model for authentication and client management"""
     
@@ -49,35 +58,32 @@ class User(Document):
         default=NotificationPreference.EMAIL,
         description="Notification preference"
     )
-    current_balance: Decimal = Field(
+    current_balance: Amount = Field(
         default=Decimal("500000"),
         description="Current balance in COP"
     )
+    token_version: int = Field(
+        default=0,
+        description="Bumped when role or status change to invalidate stateless access tokens"
+    )
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Settings:
         name = "users"
+        bson_encoders = BSON_ENCODERS
         indexes = [
             IndexModel([("email", ASCENDING)], unique=True),
             IndexModel([("created_at", DESCENDING)]),
         ]
 
-    @validator("current_balance", pre=True)
-    def validate_balance(cls, v):
-        if isinstance(v, (int, float)):
-            return Decimal(str(v))
-        elif isinstance(v, Decimal128):
-            return Decimal(str(v))
-        return v
-
 
 class Fund(Document):
     """Fund model representing investment funds"""
     
     fund_id: Indexed(int, unique=True) = Field(..., description="Fund ID")
     name: str = Field(..., description="Fund name")
-    minimum_amount: Decimal = Field(..., description="Minimum subscription amount in COP")
+    minimum_amount: Amount = Field(..., description="Minimum subscription amount in COP")
     category: FundCategory = Field(..., description="Fund category")
     description: Optional[str] = Field(None, description="Fund description")
     is_active: bool = Field(default=True, description="Fund active status")
@@ -86,20 +92,13 @@ class Fund(Document):
 
     class Settings:
         name = "funds"
+        bson_encoders = BSON_ENCODERS
         indexes = [
             IndexModel([("fund_id", ASCENDING)], unique=True),
             IndexModel([("category", ASCENDING)]),
             IndexModel([("is_active", ASCENDING)]),
         ]
 
-    @validator("minimum_amount", pre=True)
-    def validate_minimum_amount(cls, v):
-        if isinstance(v, (int, float)):
-            return Decimal(str(v))
-        elif isinstance(v, Decimal128):
-            return Decimal(str(v))
-        return v
-
 
 class Transaction(Document):
     """Transaction model for fund subscriptions and cancellations"""
@@ -108,7 +107,7 @@ class Transaction(Document):
     user_id: Indexed(str) = Field(..., description="User ID who made the transaction")
     fund_id: str = Field(..., description="Fund ID as string to match MongoDB schema")
     type: TransactionType = Field(..., description="Transaction type (matches MongoDB schema)")
-    amount: Decimal = Field(..., description="Transaction amount in COP")
+    amount: Amount = Field(..., description="Transaction amount in COP")
     status: TransactionStatus = Field(
         default=TransactionStatus.PENDING,
         description="Transaction status"
@@ -120,22 +119,17 @@ class Transaction(Document):
 
     class Settings:
         name = "transactions"
+        bson_encoders = BSON_ENCODERS
         indexes = [
             IndexModel([("transaction_id", ASCENDING)], unique=True),
             IndexModel([("user_id", ASCENDING)]),
             IndexModel([("fund_id", ASCENDING)]),
             IndexModel([("created_at", DESCENDING)]),
-            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+            # Serves history pages (keyset on created_at, _id in either direction)
+            # and the oldest-first export without an in-memory sort
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
         ]
 
-    @validator("amount", pre=True)
-    def validate_amount(cls, v):
-        if isinstance(v, (int, float)):
-            return Decimal(str(v))
-        elif isinstance(v, Decimal128):
-            return Decimal(str(v))
-        return v
-    
     @validator("fund_id", pre=True)
     def validate_fund_id(cls, v):
         # Convert int fund_id to string for MongoDB compatibility
@@ -147,13 +141,14 @@ class UserFundSubscription(Document):
     
     user_id: Indexed(str) = Field(..., description="User ID")
     fund_id: str = Field(..., description="Fund ID as string to match MongoDB schema")
-    subscription_amount: Decimal = Field(..., description="Current subscription amount")
+    subscription_amount: Amount = Field(..., description="Current subscription amount")
     is_active: bool = Field(default=True, description="Subscription status")
     subscribed_at: datetime = Field(default_factory=datetime.utcnow)
     cancelled_at: Optional[datetime] = Field(None, description="Cancellation date")
 
     class Settings:
         name = "user_fund_subscriptions"
+        bson_encoders = BSON_ENCODERS
         indexes = [
             IndexModel([("user_id", ASCENDING), ("fund_id", ASCENDING)], unique=True),
             IndexModel([("user_id", ASCENDING)]),
@@ -161,20 +156,61 @@ class UserFundSubscription(Document):
             IndexModel([("is_active", ASCENDING)]),
         ]
 
-    @validator("subscription_amount", pre=True)
-    def validate_subscription_amount(cls, v):
-        if isinstance(v, (int, float)):
-            return Decimal(str(v))
-        elif isinstance(v, Decimal128):
-            return Decimal(str(v))
-        return v
-    
     @validator("fund_id", pre=True)
     def validate_fund_id(cls, v):
         # Convert int fund_id to string for MongoDB compatibility
         return str(v)
 
 
+class NotificationOutbox(Document):
+    """Pending notification written alongside the business operation that triggers it"""
+    
+    event: TransactionType = Field(..., description="Operation that triggered the notification")
+    user_id: str = Field(..., description="User to notify")
+    fund_id: str = Field(..., description="Fund ID as string to match MongoDB schema")
+    transaction_id: str = Field(..., description="Related transaction ID")
+    amount: Amount = Field(..., description="Operation amount in COP")
+    balance: Amount = Field(..., description="User balance after the operation in COP")
+    status: OutboxStatus = Field(default=OutboxStatus.PENDING, description="Delivery status")
+    attempts: int = Field(default=0, description="Delivery attempts so far")
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    locked_by: Optional[str] = Field(None, description="Worker holding the lease")
+    locked_until: Optional[datetime] = Field(None, description="Lease held by the worker processing it")
+    last_error: Optional[str] = Field(None, description="Last delivery error")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = Field(None, description="Delivery time")
+
+    class Settings:
+        name = "notification_outbox"
+        bson_encoders = BSON_ENCODERS
+        indexes = [
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+            IndexModel([("status", ASCENDING), ("locked_until", ASCENDING)]),
+            # Delivered entries are purged after 7 days
+            IndexModel([("sent_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+        ]
+
+    @validator("fund_id", pre=True)
+    def validate_fund_id(cls, v):
+        return str(v)
+
+
+class RevokedToken(Document):
+    """Revoked refresh token, kept until the token itself would have expired"""
+    
+    jti: str = Field(..., description="Token identifier (jti claim)")
+    user_id: str = Field(..., description="Token owner")
+    expires_at: datetime = Field(..., description="Token expiration")
+    revoked_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Settings:
+        name = "revoked_tokens"
+        indexes = [
+            IndexModel([("jti", ASCENDING)], unique=True),
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        ]
+
+
 # Initialize default funds data
 DEFAULT_FUNDS = [
     {
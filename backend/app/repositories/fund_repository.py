@@ -1,15 +1,135 @@
-from typing import List, Optional
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
 from datetime import datetime
 from decimal import Decimal
 
 from beanie import PydanticObjectId
+from pymongo.errors import PyMongoError
 
+from app.core.config import settings
+from app.core.database import db, supports_transactions
+from app.core.metrics import CACHE_REQUESTS
+from app.core.tracing import traced_methods
 from app.models import Fund, DEFAULT_FUNDS
 
+logger = logging.getLogger(__name__)
 
+_catalog_hits = CACHE_REQUESTS.labels("fund_catalog", "hit")
+_catalog_misses = CACHE_REQUESTS.labels("fund_catalog", "miss")
+
+
+class FundCatalog:
+    """In-memory copy of the fund catalog, one per worker process.
+    
+    Every write bumps a version document; the cached copy is revalidated
+    against it at most every FUND_CATALOG_CHECK_SECONDS. On replica sets a
+    change stream on the funds collection invalidates it immediately.
+    Concurrent cold reads share a single load. Cached funds are shared and
+    must be treated as read-only.
+    """
+    
+    def __init__(self, check_seconds: float = settings.FUND_CATALOG_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self._funds: Optional[Dict[int, Fund]] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        # Bumped by invalidate(), so a load that overlaps one is discarded
+        self._generation = 0
+        self._loading: Optional[asyncio.Future] = None
+        self._watching = False
+        self._watch_task: Optional[asyncio.Task] = None
+    
+    def _versions(self):
+        return db.client[settings.DATABASE_NAME]["catalog_versions"]
+    
+    async def _current_version(self) -> int:
+        document = await self._versions().find_one({"_id": "funds"})
+        return document["version"] if document else 0
+    
+    async def get_funds(self) -> Dict[int, Fund]:
+        """Return the catalog keyed by fund_id, loading it if stale."""
+        funds = self._funds
+        if funds is not None and (
+            self._watching or time.monotonic() - self._checked_at < self.check_seconds
+        ):
+            _catalog_hits.inc()
+            return funds
+        
+        _catalog_misses.inc()
+        # Single flight: concurrent callers await the same refresh
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._refresh())
+            self._loading.add_done_callback(self._loading_done)
+        return await asyncio.shield(self._loading)
+    
+    def _loading_done(self, future: asyncio.Future) -> None:
+        if self._loading is future:
+            self._loading = None
+    
+    async def _refresh(self) -> Dict[int, Fund]:
+        generation = self._generation
+        version = await self._current_version()
+        if self._funds is None or version != self._version:
+            funds = await Fund.find_all().to_list()
+            catalog = {fund.fund_id: fund for fund in funds}
+            # A write or change event during the load may be missing from it;
+            # serve it to the waiting callers but do not keep it
+            if generation != self._generation or await self._current_version() != version:
+                return catalog
+            self._funds = catalog
+            self._version = version
+        self._checked_at = time.monotonic()
+        return self._funds
+    
+    def invalidate(self) -> None:
+        """Drop this worker's copy, including any load still in flight."""
+        self._funds = None
+        self._generation += 1
+    
+    async def bump_version(self) -> None:
+        """Mark the catalog as changed for every worker."""
+        await self._versions().update_one(
+            {"_id": "funds"}, {"$inc": {"version": 1}}, upsert=True
+        )
+        self.invalidate()
+    
+    async def start(self) -> None:
+        """Watch the funds collection when the deployment supports change streams."""
+        if self._watch_task is None and await supports_transactions():
+            self._watch_task = asyncio.create_task(self._watch(), name="fund-catalog-watch")
+    
+    async def stop(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
+        self._watching = False
+    
+    async def _watch(self) -> None:
+        while True:
+            try:
+                async with Fund.get_motor_collection().watch() as stream:
+                    # Changes made before the stream opened may have been missed
+                    self.invalidate()
+                    self._watching = True
+                    async for _ in stream:
+                        self.invalidate()
+            except PyMongoError as e:
+                logger.warning("Fund catalog change stream lost: %s", e)
+            finally:
+                self._watching = False
+            await asyncio.sleep(1)
+
+
+@traced_methods
 class FundRepository:
     """Repository for Fund operations."""
     
+    def __init__(self):
+        self.catalog = FundCatalog()
+    
     async def initialize_funds(self):
         """Initialize default funds if they don't exist."""
         existing_funds = await Fund.find_all().to_list()
@@ -17,18 +137,20 @@ class FundRepository:
             for fund_data in DEFAULT_FUNDS:
                 fund = Fund(**fund_data)
                 await fund.insert()
+            await self.catalog.bump_version()
     
     async def get_all(self, is_active: Optional[bool] = True) -> List[Fund]:
-        """Get all funds."""
-        query = {}
-        if is_active is not None:
-            query["is_active"] = is_active
-        
-        return await Fund.find(query).to_list()
+        """Get all funds from the catalog cache."""
+        funds = await self.catalog.get_funds()
+        return [
+            fund for fund in funds.values()
+            if is_active is None or fund.is_active == is_active
+        ]
     
     async def get_by_id(self, fund_id: int) -> Optional[Fund]:
-        """Get fund by fund_id."""
-        return await Fund.find_one(Fund.fund_id == fund_id)
+        """Get fund by fund_id from the catalog cache."""
+        funds = await self.catalog.get_funds()
+        return funds.get(fund_id)
     
     async def get_by_object_id(self, object_id: str) -> Optional[Fund]:
         """Get fund by MongoDB object ID."""
@@ -54,6 +176,7 @@ class FundRepository:
             description=description
         )
         await fund.insert()
+        await self.catalog.bump_version()
         return fund
     
     async def update(
@@ -62,7 +185,8 @@ class FundRepository:
         **kwargs
     ) -> Optional[Fund]:
         """Update fund."""
-        fund = await self.get_by_id(fund_id)
+        # Load a private copy; cached funds are shared
+        fund = await Fund.find_one(Fund.fund_id == fund_id)
         if not fund:
             return None
         
@@ -73,6 +197,7 @@ class FundRepository:
         
         fund.updated_at = datetime.utcnow()
         await fund.save()
+        await self.catalog.bump_version()
         return fund
     
     async def deactivate(self, fund_id: int) -> Optional[Fund]:
@@ -84,11 +209,12 @@ class FundRepository:
         return await self.update(fund_id, is_active=True)
     
     async def get_by_category(self, category: str) -> List[Fund]:
-        """Get funds by category."""
-        return await Fund.find(
-            Fund.category == category, 
-            Fund.is_active == True
-        ).to_list()
+        """Get funds by category from the catalog cache."""
+        funds = await self.catalog.get_funds()
+        return [
+            fund for fund in funds.values()
+            if fund.category == category and fund.is_active
+        ]
 
 
 # Create repository instance
@@ -0,0 +1,123 @@
+from typing import Optional
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo import ReturnDocument
+
+from app.core.tracing import traced_methods
+from app.models import NotificationOutbox, OutboxStatus, TransactionType
+
+
+@traced_methods
+class OutboxRepository:
+    """Repository for NotificationOutbox operations."""
+    
+    async def create(
+        self,
+        event: TransactionType,
+        user_id: str,
+        fund_id: int,  # Accept int but convert to string
+        transaction_id: str,
+        amount: Decimal,
+        balance: Decimal,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ) -> NotificationOutbox:
+        """Create a pending outbox entry."""
+        entry = NotificationOutbox(
+            event=event,
+            user_id=user_id,
+            fund_id=str(fund_id),
+            transaction_id=transaction_id,
+            amount=amount,
+            balance=balance
+        )
+        await entry.insert(session=session)
+        return entry
+    
+    async def claim_next(self, worker_id: str, lease_seconds: int) -> Optional[NotificationOutbox]:
+        """Claim the next due entry for processing.
+        
+        Entries whose lease expired (the worker holding them died or is
+        still stuck on a slow send) are claimable again.
+        """
+        now = datetime.utcnow()
+        document = await NotificationOutbox.get_motor_collection().find_one_and_update(
+            {
+                "$or": [
+                    {"status": OutboxStatus.PENDING.value, "next_attempt_at": {"$lte": now}},
+                    {"status": OutboxStatus.PROCESSING.value, "locked_until": {"$lte": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": OutboxStatus.PROCESSING.value,
+                    "locked_by": worker_id,
+                    "locked_until": now + timedelta(seconds=lease_seconds)
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if not document:
+            return None
+        
+        return NotificationOutbox.model_validate(document)
+    
+    def _leased(self, entry: NotificationOutbox) -> dict:
+        """Filter matching the entry only while this worker's lease is live."""
+        return {
+            "_id": entry.id,
+            "locked_by": entry.locked_by,
+            "locked_until": {"$gte": datetime.utcnow()}
+        }
+    
+    async def mark_sent(self, entry: NotificationOutbox) -> bool:
+        """Mark an entry as delivered.
+        
+        Returns False when the lease was lost, i.e. another worker may have
+        reclaimed the entry; its outcome is then left to that worker.
+        """
+        result = await NotificationOutbox.get_motor_collection().update_one(
+            self._leased(entry),
+            {"$set": {
+                "status": OutboxStatus.SENT.value,
+                "sent_at": datetime.utcnow(),
+                "locked_by": None,
+                "locked_until": None,
+                "last_error": None
+            }}
+        )
+        return result.modified_count == 1
+    
+    async def mark_failed(
+        self,
+        entry: NotificationOutbox,
+        error: str,
+        retry_at: Optional[datetime] = None
+    ) -> bool:
+        """Schedule a retry, or move the entry to the dead letter state when retry_at is None.
+        
+        Like mark_sent, returns False when the lease was lost.
+        """
+        status = OutboxStatus.PENDING if retry_at else OutboxStatus.DEAD_LETTER
+        result = await NotificationOutbox.get_motor_collection().update_one(
+            self._leased(entry),
+            {"$set": {
+                "status": status.value,
+                "next_attempt_at": retry_at or entry.next_attempt_at,
+                "locked_by": None,
+                "locked_until": None,
+                "last_error": error
+            }}
+        )
+        return result.modified_count == 1
+    
+    async def count_by_status(self, status: OutboxStatus) -> int:
+        """Count outbox entries in a given status."""
+        return await NotificationOutbox.find({"status": status.value}).count()
+
+
+# Create repository instance
+outbox_repository = OutboxRepository()
@@ -0,0 +1,43 @@
+from typing import AsyncIterator
+from datetime import datetime
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.tracing import traced_methods
+from app.models import RevokedToken
+
+
+@traced_methods
+class RevokedTokenRepository:
+    """Repository for RevokedToken operations."""
+    
+    async def create(self, jti: str, user_id: str, expires_at: datetime) -> bool:
+        """Record a revoked token. Returns False if it was already revoked."""
+        try:
+            await RevokedToken(jti=jti, user_id=user_id, expires_at=expires_at).insert()
+            return True
+        except DuplicateKeyError:
+            return False
+    
+    async def exists(self, jti: str) -> bool:
+        """Check whether a token is revoked."""
+        document = await RevokedToken.get_motor_collection().find_one(
+            {"jti": jti, "expires_at": {"$gt": datetime.utcnow()}}, {"_id": 1}
+        )
+        return document is not None
+    
+    async def count(self) -> int:
+        """Count revoked tokens that have not expired yet."""
+        return await RevokedToken.find({"expires_at": {"$gt": datetime.utcnow()}}).count()
+    
+    async def iter_jtis(self) -> AsyncIterator[str]:
+        """Stream identifiers of revoked tokens that have not expired yet."""
+        cursor = RevokedToken.get_motor_collection().find(
+            {"expires_at": {"$gt": datetime.utcnow()}}, {"jti": 1, "_id": 0}
+        ).batch_size(1000)
+        async for document in cursor:
+            yield document["jti"]
+
+
+# Create repository instance
+revoked_token_repository = RevokedTokenRepository()
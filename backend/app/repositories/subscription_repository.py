@@ -2,11 +2,14 @@ from typing import List, Optional
 from datetime import datetime
 
 from beanie import PydanticObjectId
+from motor.motor_asyncio import AsyncIOMotorClientSession
 
+from app.core.money import parse_amount
+from app.core.tracing import traced_methods
 from app.models import UserFundSubscription
-from app.repositories.fund_repository import fund_repository
 
 
+@traced_methods
 class SubscriptionRepository:
     """Repository for UserFundSubscription operations."""
     
@@ -14,7 +17,8 @@ class SubscriptionRepository:
         self,
         user_id: str,
         fund_id: int,  # Accept int but convert to string
-        subscription_amount: float
+        subscription_amount: float,
+        session: Optional[AsyncIOMotorClientSession] = None
     ) -> UserFundSubscription:
         """Create a new subscription."""
         subscription = UserFundSubscription(
@@ -23,7 +27,7 @@ class SubscriptionRepository:
             subscription_amount=subscription_amount,
             is_active=True
         )
-        await subscription.insert()
+        await subscription.insert(session=session)
         return subscription
     
     async def get_by_user_and_fund(
@@ -43,46 +47,92 @@ class SubscriptionRepository:
         user_id: str,
         is_active: Optional[bool] = True
     ) -> List[dict]:
-        """Get user subscriptions with fund details."""
+        """Get user subscriptions with fund details.
+        
+        Funds are joined server-side with a single $lookup, projecting only the
+        fields UserFundSubscriptionResponse needs.
+        """
         query = {"user_id": user_id}
         if is_active is not None:
             query["is_active"] = is_active
         
-        subscriptions = await UserFundSubscription.find(query).to_list()
-        
-        # Enrich with fund data
-        result = []
-        for subscription in subscriptions:
-            # Convert string fund_id back to int for fund lookup
-            fund_id_int = int(subscription.fund_id) if subscription.fund_id.isdigit() else None
-            if fund_id_int:
-                fund = await fund_repository.get_by_id(fund_id_int)
-                if fund:
-                    result.append({
-                        "id": str(subscription.id),
-                        "user_id": subscription.user_id,
-                        "fund_id": subscription.fund_id,
-                        "fund_name": fund.name,
-                        "subscription_amount": subscription.subscription_amount,
-                        "is_active": subscription.is_active,
-                        "subscribed_at": subscription.subscribed_at,
-                        "cancelled_at": subscription.cancelled_at
-                    })
+        pipeline = [
+            {"$match": query},
+            {"$lookup": {
+                "from": "funds",
+                # fund_id is stored as a string here and as an int in funds
+                "let": {"fund_id": {"$convert": {
+                    "input": "$fund_id", "to": "int", "onError": None, "onNull": None
+                }}},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$fund_id", "$$fund_id"]}}},
+                    {"$project": {"_id": 0, "name": 1}}
+                ],
+                "as": "fund"
+            }},
+            {"$unwind": "$fund"},
+            {"$project": {
+                "user_id": 1,
+                "fund_id": 1,
+                "fund_name": "$fund.name",
+                "subscription_amount": 1,
+                "is_active": 1,
+                "subscribed_at": 1,
+                "cancelled_at": 1
+            }}
+        ]
+        documents = await UserFundSubscription.get_motor_collection()\
+            .aggregate(pipeline)\
+            .to_list(length=None)
         
-        return result
+        return [
+            {
+                "id": str(document["_id"]),
+                "user_id": document["user_id"],
+                "fund_id": document["fund_id"],
+                "fund_name": document["fund_name"],
+                "subscription_amount": parse_amount(document["subscription_amount"]),
+                "is_active": document["is_active"],
+                "subscribed_at": document["subscribed_at"],
+                "cancelled_at": document.get("cancelled_at")
+            }
+            for document in documents
+        ]
     
     async def cancel_subscription(
         self, 
         user_id: str, 
-        fund_id: int  # Accept int but convert to string
+        fund_id: int,  # Accept int but convert to string
+        session: Optional[AsyncIOMotorClientSession] = None
     ) -> Optional[UserFundSubscription]:
-        """Cancel user subscription to fund by deleting the record."""
-        subscription = await self.get_by_user_and_fund(user_id, fund_id)
-        if not subscription:
-            return None
+        """Cancel user subscription to fund by deleting the record.
         
+        The lookup and delete run as a single find-and-modify, so concurrent
+        cancellations of the same subscription cannot both succeed.
+        """
         # Delete the subscription record completely to avoid unique index conflicts
-        await subscription.delete()
+        document = await UserFundSubscription.get_motor_collection().find_one_and_delete({
+            "user_id": user_id,
+            "fund_id": str(fund_id),
+            "is_active": True
+        }, session=session)
+        if not document:
+            return None
+        
+        return UserFundSubscription.model_validate(document)
+    
+    async def delete(
+        self,
+        subscription: UserFundSubscription,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ) -> bool:
+        """Delete a subscription record; False if it was already gone."""
+        result = await subscription.delete(session=session)
+        return bool(result and result.deleted_count)
+    
+    async def restore(self, subscription: UserFundSubscription) -> UserFundSubscription:
+        """Re-insert a previously deleted subscription record."""
+        await subscription.insert()
         return subscription
     
     async def get_fund_subscriptions(
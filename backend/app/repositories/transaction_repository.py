@@ -1,16 +1,41 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple, Type
 from datetime import datetime
 from decimal import Decimal
 import uuid
 
 from beanie import PydanticObjectId
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pydantic import BaseModel
 
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.tracing import traced_methods
 from app.models import Transaction, TransactionType, TransactionStatus
 
 
+@traced_methods
 class TransactionRepository:
     """Repository for Transaction operations."""
     
+    def __init__(self):
+        # Totals keyed by (user_id, type, status); exact on this node, TTL-bounded elsewhere
+        self._counts: TTLCache[int] = TTLCache(
+            maxsize=settings.TRANSACTION_COUNT_CACHE_MAX_SIZE,
+            ttl=settings.TRANSACTION_COUNT_CACHE_TTL_SECONDS,
+            name="transaction_counts"
+        )
+    
+    def invalidate_counts(self, user_id: str) -> None:
+        """Drop every cached total of a user.
+        
+        Inserts made inside a transaction session leave this to the caller,
+        once the transaction has committed.
+        """
+        for transaction_type in [None, *TransactionType]:
+            for status in [None, *TransactionStatus]:
+                self._counts.invalidate((user_id, transaction_type, status))
+    
     def _generate_transaction_id(self) -> str:
         """Generate unique transaction ID."""
         return f"TXN_{datetime.utcnow().strftime('%Y%m%d')}_{uuid.uuid4().hex[:8].upper()}"
@@ -21,7 +46,9 @@ class TransactionRepository:
         fund_id: int,  # Accept int but convert to string
         transaction_type: TransactionType,
         amount: Decimal,
-        description: Optional[str] = None
+        description: Optional[str] = None,
+        status: TransactionStatus = TransactionStatus.PENDING,
+        session: Optional[AsyncIOMotorClientSession] = None
     ) -> Transaction:
         """Create a new transaction."""
         transaction = Transaction(
@@ -31,9 +58,12 @@ class TransactionRepository:
             type=transaction_type,  # Use 'type' instead of 'transaction_type'
             amount=amount,
             description=description,
-            status=TransactionStatus.PENDING
+            status=status,
+            completed_at=datetime.utcnow() if status == TransactionStatus.COMPLETED else None
         )
-        await transaction.insert()
+        await transaction.insert(session=session)
+        if session is None:
+            self.invalidate_counts(user_id)
         return transaction
     
     async def get_by_id(self, transaction_id: str) -> Optional[Transaction]:
@@ -64,6 +94,7 @@ class TransactionRepository:
             transaction.completed_at = datetime.utcnow()
         
         await transaction.save()
+        self.invalidate_counts(transaction.user_id)
         return transaction
     
     async def get_user_transactions(
@@ -72,9 +103,14 @@ class TransactionRepository:
         skip: int = 0,
         limit: int = 10,
         transaction_type: Optional[TransactionType] = None,
-        status: Optional[TransactionStatus] = None
+        status: Optional[TransactionStatus] = None,
+        projection: Optional[Type[BaseModel]] = None
     ) -> List[Transaction]:
-        """Get user transactions with pagination and filters."""
+        """Get user transactions with pagination and filters.
+        
+        With projection only that model's fields are fetched and the rows
+        are returned as instances of it.
+        """
         query = {"user_id": user_id}
         
         if transaction_type:
@@ -83,11 +119,94 @@ class TransactionRepository:
         if status:
             query["status"] = status
         
-        return await Transaction.find(query)\
+        cursor = Transaction.find(query)\
             .sort(-Transaction.created_at)\
             .skip(skip)\
-            .limit(limit)\
-            .to_list()
+            .limit(limit)
+        if projection:
+            cursor = cursor.project(projection)
+        return await cursor.to_list()
+    
+    async def get_user_transactions_page(
+        self,
+        user_id: str,
+        limit: int = 10,
+        after: Optional[Tuple[datetime, ObjectId]] = None,
+        before: Optional[Tuple[datetime, ObjectId]] = None,
+        transaction_type: Optional[TransactionType] = None,
+        status: Optional[TransactionStatus] = None,
+        projection: Optional[Type[BaseModel]] = None
+    ) -> Tuple[List[Transaction], bool]:
+        """Get a page of user transactions by keyset, newest first.
+        
+        after/before are (created_at, _id) positions of the last/first row of
+        the previous page; the query seeks into the (user_id, created_at, _id) index
+        instead of skipping rows. Returns the page and whether more rows exist
+        beyond it in the requested direction.
+        """
+        query = {"user_id": user_id}
+        
+        if transaction_type:
+            query["type"] = transaction_type
+        
+        if status:
+            query["status"] = status
+        
+        position = after or before
+        operator = "$lt" if before is None else "$gt"
+        if position:
+            created_at, object_id = position
+            query["$or"] = [
+                {"created_at": {operator: created_at}},
+                {"created_at": created_at, "_id": {operator: object_id}}
+            ]
+        
+        # Walk backwards in ascending order when paging towards newer rows
+        direction = -1 if before is None else 1
+        cursor = Transaction.find(query)\
+            .sort([("created_at", direction), ("_id", direction)])\
+            .limit(limit + 1)
+        if projection:
+            cursor = cursor.project(projection)
+        transactions = await cursor.to_list()
+        
+        has_more = len(transactions) > limit
+        transactions = transactions[:limit]
+        if before is not None:
+            transactions.reverse()
+        
+        return transactions, has_more
+    
+    async def iter_user_transactions(
+        self,
+        user_id: str,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        batch_size: int = 500
+    ) -> AsyncIterator[dict]:
+        """Stream a user's raw transaction documents, oldest first.
+        
+        Documents are pulled from the cursor batch_size at a time and never
+        accumulated, so memory stays flat regardless of history length. The
+        sort walks the (user_id, created_at, _id) index backwards instead of
+        sorting in memory.
+        """
+        query = {"user_id": user_id}
+        
+        created_at = {}
+        if date_from:
+            created_at["$gte"] = date_from
+        if date_to:
+            created_at["$lt"] = date_to
+        if created_at:
+            query["created_at"] = created_at
+        
+        cursor = Transaction.get_motor_collection()\
+            .find(query, {"user_id": 0})\
+            .sort([("created_at", 1), ("_id", 1)])\
+            .batch_size(batch_size)
+        async for document in cursor:
+            yield document
     
     async def count_user_transactions(
         self,
@@ -95,7 +214,16 @@ class TransactionRepository:
         transaction_type: Optional[TransactionType] = None,
         status: Optional[TransactionStatus] = None
     ) -> int:
-        """Count user transactions with filters."""
+        """Count user transactions with filters.
+        
+        Totals are cached for TRANSACTION_COUNT_CACHE_TTL_SECONDS and dropped
+        whenever this node writes a transaction of the user.
+        """
+        key = (user_id, transaction_type or None, status or None)
+        total = self._counts.get(key)
+        if total is not None:
+            return total
+        
         query = {"user_id": user_id}
         
         if transaction_type:
@@ -104,7 +232,9 @@ class TransactionRepository:
         if status:
             query["status"] = status
         
-        return await Transaction.find(query).count()
+        total = await Transaction.find(query).count()
+        self._counts.set(key, total)
+        return total
     
     async def get_fund_transactions(
         self,
@@ -121,13 +251,16 @@ class TransactionRepository:
     
     async def get_recent_transactions(
         self,
-        limit: int = 10
+        limit: int = 10,
+        projection: Optional[Type[BaseModel]] = None
     ) -> List[Transaction]:
         """Get recent transactions."""
-        return await Transaction.find()\
+        cursor = Transaction.find()\
             .sort(-Transaction.created_at)\
-            .limit(limit)\
-            .to_list()
+            .limit(limit)
+        if projection:
+            cursor = cursor.project(projection)
+        return await cursor.to_list()
 
 
 # Create repository instance
@@ -2,16 +2,51 @@ from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
-from beanie import PydanticObjectId
+from beanie import PydanticObjectId, UpdateResponse
+from bson import Decimal128
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo import ReturnDocument
 from pymongo.errors import DuplicateKeyError
 
 from app.models import User, UserRole
+from app.core.cache import TTLCache, cache_invalidation_bus
+from app.core.config import settings
+from app.core.money import MINOR_UNITS_STORAGE, Money, minor_units_expr
 from app.core.security import security
+from app.core.tracing import traced_methods
 
 
+@traced_methods
 class UserRepository:
     """Repository for User operations."""
     
+    def __init__(self):
+        # Active users served to the auth dependency; treat cached users as read-only
+        self._active_users: TTLCache[User] = TTLCache(
+            maxsize=settings.USER_CACHE_MAX_SIZE,
+            ttl=settings.USER_CACHE_TTL_SECONDS,
+            name="users"
+        )
+        self._token_versions: TTLCache[int] = TTLCache(
+            maxsize=settings.USER_CACHE_MAX_SIZE,
+            ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+            name="token_versions"
+        )
+        cache_invalidation_bus.register("users", self._drop_cached)
+    
+    def _drop_cached(self, user_id: str) -> None:
+        self._active_users.invalidate(user_id)
+        self._token_versions.invalidate(user_id)
+    
+    async def invalidate(self, user_id: str) -> None:
+        """Drop a user from this node's caches and from its peers'.
+        
+        Writes made inside a transaction session leave this to the caller,
+        once the transaction has committed.
+        """
+        self._drop_cached(user_id)
+        await cache_invalidation_bus.publish("users", user_id)
+    
     async def create(
         self, 
         email: str, 
@@ -22,7 +57,7 @@ class UserRepository:
     ) -> User:
         """Create a new user."""
         try:
-            hashed_password = security.get_password_hash(password)
+            hashed_password = await security.get_password_hash_async(password)
             user = User(
                 email=email,
                 hashed_password=hashed_password,
@@ -41,39 +76,183 @@ class UserRepository:
         """Get user by email."""
         return await User.find_one(User.email == email)
     
-    async def get_by_id(self, user_id: str) -> Optional[User]:
+    async def get_by_id(
+        self,
+        user_id: str,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ) -> Optional[User]:
         """Get user by ID."""
         try:
-            return await User.get(PydanticObjectId(user_id))
+            return await User.get(PydanticObjectId(user_id), session=session)
         except Exception:
             return None
     
-    async def update(self, user_id: str, **kwargs) -> Optional[User]:
-        """Update user."""
+    async def get_active_by_id(self, user_id: str) -> Optional[User]:
+        """Get an active user by ID, served from the in-process cache when possible."""
+        user = self._active_users.get(user_id)
+        if user is not None:
+            return user
+        
         user = await self.get_by_id(user_id)
-        if not user:
+        if user and user.is_active:
+            self._active_users.set(user_id, user)
+        return user
+    
+    async def get_token_version(self, user_id: str) -> Optional[int]:
+        """Get the user's current token version, or None if the user does not exist."""
+        version = self._token_versions.get(user_id)
+        if version is not None:
+            return version
+        
+        try:
+            object_id = PydanticObjectId(user_id)
+        except Exception:
+            return None
+        
+        document = await User.get_motor_collection().find_one(
+            {"_id": object_id}, {"token_version": 1}
+        )
+        if not document:
+            return None
+        
+        version = document.get("token_version", 0)
+        self._token_versions.set(user_id, version)
+        return version
+    
+    async def update(self, user_id: str, **kwargs) -> Optional[User]:
+        """Update user.
+        
+        Only the given fields are written, with a single atomic update, so a
+        concurrent debit or credit of the balance is never overwritten.
+        Changing role or active status bumps token_version, which revokes
+        stateless access tokens issued before the change; whether a value
+        changes is part of the update's filter, so concurrent changes each
+        get their own bump.
+        """
+        try:
+            object_id = PydanticObjectId(user_id)
+        except Exception:
             return None
         
-        # Update fields
-        for key, value in kwargs.items():
-            if hasattr(user, key) and value is not None:
-                setattr(user, key, value)
+        changes = {
+            key: value for key, value in kwargs.items()
+            if key in User.model_fields and value is not None
+        }
+        changes["updated_at"] = datetime.utcnow()
         
-        user.updated_at = datetime.utcnow()
-        await user.save()
+        user = None
+        revoking = {key: changes[key] for key in ("role", "is_active") if key in changes}
+        if revoking:
+            user = await User.find_one({
+                "_id": object_id,
+                "$or": [{key: {"$ne": value}} for key, value in revoking.items()]
+            }).update(
+                {"$set": changes, "$inc": {"token_version": 1}},
+                response_type=UpdateResponse.NEW_DOCUMENT
+            )
+        if user is None:
+            # Nothing to revoke, or role and status already had these values
+            user = await User.find_one({"_id": object_id}).update(
+                {"$set": changes}, response_type=UpdateResponse.NEW_DOCUMENT
+            )
+        if user:
+            await self.invalidate(user_id)
         return user
     
-    async def update_balance(self, user_id: str, new_balance: Decimal) -> Optional[User]:
-        """Update user balance."""
-        user = await self.get_by_id(user_id)
-        if not user:
+    async def debit_balance(
+        self,
+        user_id: str,
+        amount: Decimal,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ) -> Optional[User]:
+        """Atomically subtract amount from the balance if it is sufficient.
+
+        Returns the updated user, or None when the user does not exist or the
+        balance is lower than amount.
+        """
+        try:
+            object_id = PydanticObjectId(user_id)
+        except Exception:
             return None
         
-        user.current_balance = new_balance
-        user.updated_at = datetime.utcnow()
-        await user.save()
+        if MINOR_UNITS_STORAGE:
+            user = await self._add_minor_units(
+                object_id, -Money.from_decimal(amount), session, require_funds=True
+            )
+        else:
+            user = await User.find_one(
+                {"_id": object_id, "current_balance": {"$gte": Decimal128(amount)}}
+            ).update(
+                {
+                    "$inc": {"current_balance": Decimal128(-amount)},
+                    "$set": {"updated_at": datetime.utcnow()}
+                },
+                session=session,
+                response_type=UpdateResponse.NEW_DOCUMENT
+            )
+        if user and session is None:
+            await self.invalidate(user_id)
         return user
     
+    async def credit_balance(
+        self,
+        user_id: str,
+        amount: Decimal,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ) -> Optional[User]:
+        """Atomically add amount to the balance and return the updated user."""
+        try:
+            object_id = PydanticObjectId(user_id)
+        except Exception:
+            return None
+        
+        if MINOR_UNITS_STORAGE:
+            user = await self._add_minor_units(object_id, Money.from_decimal(amount), session)
+        else:
+            user = await User.find_one({"_id": object_id}).update(
+                {
+                    "$inc": {"current_balance": Decimal128(amount)},
+                    "$set": {"updated_at": datetime.utcnow()}
+                },
+                session=session,
+                response_type=UpdateResponse.NEW_DOCUMENT
+            )
+        if user and session is None:
+            await self.invalidate(user_id)
+        return user
+    
+    async def _add_minor_units(
+        self,
+        object_id: PydanticObjectId,
+        delta: Money,
+        session: Optional[AsyncIOMotorClientSession] = None,
+        require_funds: bool = False
+    ) -> Optional[User]:
+        """Add delta to the balance as integer minor units.
+        
+        The update pipeline normalizes a balance still stored as Decimal128,
+        so users not yet reached by the migration are converted in the same
+        atomic write.
+        """
+        balance = minor_units_expr("current_balance")
+        query = {"_id": object_id}
+        if require_funds:
+            query["$expr"] = {"$gte": [balance, -delta.minor]}
+        
+        document = await User.get_motor_collection().find_one_and_update(
+            query,
+            [{"$set": {
+                "current_balance": {"$add": [balance, delta.minor]},
+                "updated_at": datetime.utcnow()
+            }}],
+            session=session,
+            return_document=ReturnDocument.AFTER
+        )
+        if not document:
+            return None
+        
+        return User.model_validate(document)
+    
     async def deactivate(self, user_id: str) -> Optional[User]:
         """Deactivate user."""
         return await self.update(user_id, is_active=False)
@@ -109,7 +288,7 @@ class UserRepository:
         if not user:
             return None
         
-        if not security.verify_password(password, user.hashed_password):
+        if not await security.verify_password_async(password, user.hashed_password):
             return None
         
         return user
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
 
@@ -6,13 +6,39 @@ from fastapi import HTTPException, status
 
 from app.models import User, UserRole
 from app.repositories.user_repository import user_repository
+from app.core.config import settings
 from app.core.security import security
+from app.core.tracing import traced
 from app.api.schemas import UserCreate, UserUpdate, Token
+from app.services.token_revocation_service import token_revocation_service
 
 
 class AuthService:
     """Service for authentication operations."""
     
+    def _create_access_token(self, user: User) -> str:
+        """Create an access token for user.
+        
+        In stateless mode the token carries role, status and token version
+        and lives for a short time, so role checks do not need the database.
+        """
+        if settings.STATELESS_AUTH_ENABLED:
+            return security.create_access_token(
+                subject=str(user.id),
+                expires_delta=timedelta(minutes=settings.STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES),
+                claims={
+                    "role": user.role.value,
+                    "active": user.is_active,
+                    "ver": user.token_version
+                }
+            )
+        
+        return security.create_access_token(
+            subject=str(user.id),
+            expires_delta=timedelta(minutes=30)  # 30 minutes
+        )
+    
+    @traced()
     async def register(self, user_data: UserCreate) -> User:
         """Register a new user."""
         # Check if user already exists
@@ -40,6 +66,7 @@ class AuthService:
                 detail=str(e)
             )
     
+    @traced()
     async def authenticate(self, email: str, password: str) -> Token:
         """Authenticate user and return tokens."""
         user = await user_repository.authenticate(email, password)
@@ -57,13 +84,9 @@ class AuthService:
             )
         
         # Create tokens
-        access_token_expires = timedelta(minutes=30)  # 30 minutes
         refresh_token_expires = timedelta(days=7)     # 7 days
         
-        access_token = security.create_access_token(
-            subject=str(user.id),
-            expires_delta=access_token_expires
-        )
+        access_token = self._create_access_token(user)
         
         refresh_token = security.create_refresh_token(
             subject=str(user.id),
@@ -76,8 +99,8 @@ class AuthService:
             token_type="bearer"
         )
     
-    async def refresh_token(self, refresh_token: str) -> Token:
-        """Refresh access token using refresh token."""
+    def _validate_refresh_token(self, refresh_token: str) -> Tuple[str, dict]:
+        """Return the user ID and claims of a revocable refresh token, or raise 401."""
         try:
             user_id = security.validate_refresh_token(refresh_token)
         except HTTPException:
@@ -86,6 +109,31 @@ class AuthService:
                 detail="Invalid refresh token"
             )
         
+        payload = security.decode_token(refresh_token)
+        # Tokens issued before revocation existed cannot be rotated or revoked
+        if not payload.get("jti"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+        return user_id, payload
+    
+    @traced()
+    async def refresh_token(self, refresh_token: str) -> Token:
+        """Exchange a refresh token for a new access/refresh token pair.
+        
+        Refresh tokens are single use: the presented token is revoked as the
+        new pair is issued, so only the latest token of a chain is valid and
+        logout ends the whole chain.
+        """
+        user_id, payload = self._validate_refresh_token(refresh_token)
+        jti = payload["jti"]
+        if await token_revocation_service.is_revoked(jti):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked"
+            )
+        
         # Verify user still exists and is active
         user = await user_repository.get_by_id(user_id)
         if not user or not user.is_active:
@@ -94,14 +142,21 @@ class AuthService:
                 detail="User not found or inactive"
             )
         
+        # Rotate; of two concurrent refreshes with the same token only one wins
+        if not await token_revocation_service.revoke(
+            jti=jti,
+            user_id=user_id,
+            expires_at=datetime.utcfromtimestamp(payload["exp"])
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked"
+            )
+        
         # Create new tokens
-        access_token_expires = timedelta(minutes=30)
         refresh_token_expires = timedelta(days=7)
         
-        new_access_token = security.create_access_token(
-            subject=user_id,
-            expires_delta=access_token_expires
-        )
+        new_access_token = self._create_access_token(user)
         
         new_refresh_token = security.create_refresh_token(
             subject=user_id,
@@ -113,6 +168,18 @@ class AuthService:
             refresh_token=new_refresh_token,
             token_type="bearer"
         )
+    
+    @traced()
+    async def logout(self, refresh_token: str) -> None:
+        """Revoke a refresh token; anything else is rejected."""
+        user_id, payload = self._validate_refresh_token(refresh_token)
+        jti = payload["jti"]
+        
+        await token_revocation_service.revoke(
+            jti=jti,
+            user_id=user_id,
+            expires_at=datetime.utcfromtimestamp(payload["exp"])
+        )
 
 
 class UserService:
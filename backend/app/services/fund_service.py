@@ -1,15 +1,24 @@
-from typing import List, Optional
+import logging
+from typing import Any, Awaitable, List, Optional, Tuple
 from decimal import Decimal
 from datetime import datetime
 
 from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClientSession
+from pymongo.errors import DuplicateKeyError, PyMongoError
 
+from app.core.database import db, run_in_transaction
+from app.core.metrics import count_outcomes
+from app.core.tracing import traced
 from app.models import Fund, Transaction, TransactionType, TransactionStatus, User
 from app.repositories.fund_repository import fund_repository
 from app.repositories.user_repository import user_repository
 from app.repositories.transaction_repository import transaction_repository
 from app.repositories.subscription_repository import subscription_repository
-from app.services.notification_service import notification_service
+from app.repositories.outbox_repository import outbox_repository
+from app.services.notification_dispatcher import notification_dispatcher
+
+logger = logging.getLogger(__name__)
 
 
 class FundService:
@@ -30,21 +39,20 @@ class FundService:
             )
         return fund
     
+    @traced()
+    @count_outcomes("subscribe")
     async def subscribe_to_fund(
         self, 
         user_id: str, 
         fund_id: int, 
         amount: Decimal
     ) -> dict:
-        """Subscribe user to a fund."""
-        # Get user and fund
-        user = await user_repository.get_by_id(user_id)
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+        """Subscribe user to a fund.
         
+        The balance check and debit happen in a single conditional update, so
+        concurrent requests cannot spend the same balance twice. When MongoDB
+        transactions are enabled all writes commit or roll back together.
+        """
         fund = await fund_repository.get_by_id(fund_id)
         if not fund:
             raise HTTPException(
@@ -65,162 +73,296 @@ class FundService:
                 detail=f"Minimum subscription amount is COP ${fund.minimum_amount:,.0f}"
             )
         
-        # Check if user has sufficient balance
-        if user.current_balance < amount:
+        if db.transactions_enabled:
+            try:
+                user, transaction = await run_in_transaction(
+                    lambda session: self._apply_subscription(user_id, fund, amount, session)
+                )
+            except PyMongoError as e:
+                logger.exception("Error in subscribe_to_fund")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to process subscription: {str(e)}"
+                )
+            # Only now are the new balance and transaction visible to other readers
+            await user_repository.invalidate(user_id)
+            transaction_repository.invalidate_counts(user_id)
+        else:
+            user, transaction = await self._apply_subscription(user_id, fund, amount)
+        
+        # Wake the outbox workers; the notification is sent in the background
+        notification_dispatcher.notify()
+        
+        return {
+            "success": True,
+            "message": f"Successfully subscribed to fund {fund.name}",
+            "transaction_id": transaction.transaction_id,
+            "amount": amount,
+            "new_balance": user.current_balance
+        }
+    
+    @traced()
+    @count_outcomes("cancel")
+    async def cancel_subscription(self, user_id: str, fund_id: int) -> dict:
+        """Cancel user subscription to a fund.
+        
+        The subscription is removed with a single find-and-delete and the
+        refund is applied with an atomic increment. When MongoDB transactions
+        are enabled all writes commit or roll back together.
+        """
+        fund = await fund_repository.get_by_id(fund_id)
+        if not fund:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"No tiene saldo disponible para vincularse al fondo {fund.name}"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Fund not found"
             )
         
-        # Check if user already subscribed to this fund
-        existing_subscription = await subscription_repository.get_by_user_and_fund(
-            user_id, fund_id
-        )
-        if existing_subscription:
+        if db.transactions_enabled:
+            try:
+                user, transaction, amount = await run_in_transaction(
+                    lambda session: self._apply_cancellation(user_id, fund, session)
+                )
+            except PyMongoError:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Failed to process cancellation"
+                )
+            # Only now are the refund and transaction visible to other readers
+            await user_repository.invalidate(user_id)
+            transaction_repository.invalidate_counts(user_id)
+        else:
+            user, transaction, amount = await self._apply_cancellation(user_id, fund)
+        
+        # Wake the outbox workers; the notification is sent in the background
+        notification_dispatcher.notify()
+        
+        return {
+            "success": True,
+            "message": f"Successfully cancelled subscription to fund {fund.name}",
+            "transaction_id": transaction.transaction_id,
+            "refunded_amount": amount,
+            "new_balance": user.current_balance
+        }
+    
+    @traced()
+    async def _apply_subscription(
+        self,
+        user_id: str,
+        fund: Fund,
+        amount: Decimal,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ) -> Tuple[User, Transaction]:
+        """Write the debit, subscription, transaction and outbox records.
+        
+        Without a session, earlier writes are compensated by hand when a later
+        one fails; inside a transaction, raising is enough to roll back.
+        """
+        # Debit the balance first, and only if it is sufficient. A subscription
+        # that a concurrent cancellation can refund must never exist before
+        # its money has been taken.
+        user = await user_repository.debit_balance(user_id, amount, session=session)
+        if not user:
+            if not await user_repository.get_by_id(user_id, session=session):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User already subscribed to this fund"
+                detail=f"No tiene saldo disponible para vincularse al fondo {fund.name}"
+            )
+        
+        # The unique (user_id, fund_id) index rejects duplicates without a separate lookup
+        try:
+            subscription = await subscription_repository.create(
+                user_id=user_id,
+                fund_id=fund.fund_id,
+                subscription_amount=amount,
+                session=session
             )
+        except Exception as e:
+            if session is None:
+                await self._compensate(
+                    f"refund of {amount} to user {user_id}",
+                    user_repository.credit_balance(user_id, amount),
+                    expect_document=True
+                )
+            if isinstance(e, DuplicateKeyError):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="User already subscribed to this fund"
+                )
+            raise
         
         try:
-            # Create transaction
+            # The money has already moved, so the transaction is recorded as completed
             transaction = await transaction_repository.create(
                 user_id=user_id,
-                fund_id=fund_id,
+                fund_id=fund.fund_id,
                 transaction_type=TransactionType.SUBSCRIPTION,
                 amount=amount,
-                description=f"Subscription to fund {fund.name}"
-            )
-            
-            # Update user balance
-            new_balance = user.current_balance - amount
-            await user_repository.update_balance(user_id, new_balance)
-            
-            # Create subscription
-            await subscription_repository.create(
-                user_id=user_id,
-                fund_id=fund_id,
-                subscription_amount=amount
-            )
-            
-            # Update transaction status to completed
-            await transaction_repository.update_status(
-                transaction.transaction_id,
-                TransactionStatus.COMPLETED
+                description=f"Subscription to fund {fund.name}",
+                status=TransactionStatus.COMPLETED,
+                session=session
             )
+        except Exception as e:
+            if session is not None:
+                raise
             
-            # Send notification
-            await notification_service.send_subscription_notification(
-                user=user,
-                fund=fund,
-                amount=amount
+            # Undo the subscription and the debit if the transaction cannot be
+            # recorded. A cancellation that claimed the subscription meanwhile
+            # has already refunded the amount.
+            removed = await self._compensate(
+                f"removal of subscription of user {user_id} to fund {fund.fund_id}",
+                subscription_repository.delete(subscription)
             )
-            
-            return {
-                "success": True,
-                "message": f"Successfully subscribed to fund {fund.name}",
-                "transaction_id": transaction.transaction_id,
-                "amount": amount,
-                "new_balance": new_balance
-            }
-            
-        except Exception as e:
-            # If anything fails, mark transaction as failed
-            if 'transaction' in locals():
-                await transaction_repository.update_status(
-                    transaction.transaction_id,
-                    TransactionStatus.FAILED
+            if removed:
+                await self._compensate(
+                    f"refund of {amount} to user {user_id}",
+                    user_repository.credit_balance(user_id, amount),
+                    expect_document=True
                 )
             
-            # Log the actual error for debugging
-            print(f"Error in subscribe_to_fund: {str(e)}")
-            print(f"Error type: {type(e)}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
-            
+            logger.exception("Error in subscribe_to_fund")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to process subscription: {str(e)}"
             )
+        
+        await self._queue_notification(
+            TransactionType.SUBSCRIPTION, user, fund, transaction, amount, session
+        )
+        return user, transaction
     
-    async def cancel_subscription(self, user_id: str, fund_id: int) -> dict:
-        """Cancel user subscription to a fund."""
-        # Get user and fund
-        user = await user_repository.get_by_id(user_id)
-        if not user:
+    @traced()
+    async def _apply_cancellation(
+        self,
+        user_id: str,
+        fund: Fund,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ) -> Tuple[User, Transaction, Decimal]:
+        """Remove the subscription, refund the balance and record the transaction and outbox entry."""
+        # Remove the active subscription, if any
+        subscription = await subscription_repository.cancel_subscription(
+            user_id, fund.fund_id, session=session
+        )
+        if not subscription:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
+                detail="No active subscription found for this fund"
             )
         
-        fund = await fund_repository.get_by_id(fund_id)
-        if not fund:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Fund not found"
-            )
+        amount = subscription.subscription_amount
         
-        # Check if user has active subscription
-        subscription = await subscription_repository.get_by_user_and_fund(
-            user_id, fund_id
-        )
-        if not subscription:
+        # Return money to user balance; without a session the subscription is
+        # put back if the refund cannot be applied
+        try:
+            user = await user_repository.credit_balance(user_id, amount, session=session)
+        except Exception:
+            if session is None:
+                await self._compensate(
+                    f"restore of subscription of user {user_id} to fund {fund.fund_id}",
+                    subscription_repository.restore(subscription)
+                )
+            raise
+        if not user:
+            if session is None:
+                await self._compensate(
+                    f"restore of subscription of user {user_id} to fund {fund.fund_id}",
+                    subscription_repository.restore(subscription)
+                )
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="No active subscription found for this fund"
+                detail="User not found"
             )
         
         try:
-            # Create cancellation transaction
             transaction = await transaction_repository.create(
                 user_id=user_id,
-                fund_id=fund_id,
+                fund_id=fund.fund_id,
                 transaction_type=TransactionType.CANCELLATION,
-                amount=subscription.subscription_amount,
-                description=f"Cancellation of subscription to fund {fund.name}"
+                amount=amount,
+                description=f"Cancellation of subscription to fund {fund.name}",
+                status=TransactionStatus.COMPLETED,
+                session=session
             )
+        except Exception:
+            if session is not None:
+                raise
             
-            # Return money to user balance
-            new_balance = user.current_balance + subscription.subscription_amount
-            await user_repository.update_balance(user_id, new_balance)
-            
-            # Cancel subscription
-            await subscription_repository.cancel_subscription(user_id, fund_id)
-            
-            # Update transaction status to completed
-            await transaction_repository.update_status(
-                transaction.transaction_id,
-                TransactionStatus.COMPLETED
+            # Undo the refund and restore the subscription
+            await self._compensate(
+                f"reversal of refund of {amount} to user {user_id}",
+                user_repository.debit_balance(user_id, amount),
+                expect_document=True
             )
-            
-            # Send notification
-            await notification_service.send_cancellation_notification(
-                user=user,
-                fund=fund,
-                amount=subscription.subscription_amount
+            await self._compensate(
+                f"restore of subscription of user {user_id} to fund {fund.fund_id}",
+                subscription_repository.restore(subscription)
             )
             
-            return {
-                "success": True,
-                "message": f"Successfully cancelled subscription to fund {fund.name}",
-                "transaction_id": transaction.transaction_id,
-                "refunded_amount": subscription.subscription_amount,
-                "new_balance": new_balance
-            }
-            
-        except Exception as e:
-            # If anything fails, mark transaction as failed
-            if 'transaction' in locals():
-                await transaction_repository.update_status(
-                    transaction.transaction_id,
-                    TransactionStatus.FAILED
-                )
-            
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to process cancellation"
             )
+        
+        await self._queue_notification(
+            TransactionType.CANCELLATION, user, fund, transaction, amount, session
+        )
+        return user, transaction, amount
+    
+    async def _compensate(
+        self,
+        description: str,
+        undo: Awaitable[Any],
+        expect_document: bool = False
+    ) -> Any:
+        """Await a compensating write of the non-transactional path.
+        
+        A failed compensation leaves the user's records inconsistent; it is
+        logged for manual reconciliation and the original error is raised.
+        Returns the write's result, or None when it raised.
+        """
+        try:
+            result = await undo
+        except Exception:
+            logger.exception("Compensation failed: %s", description)
+            return None
+        if expect_document and result is None:
+            logger.error("Compensation failed: %s (no document matched)", description)
+        return result
+    
+    @traced()
+    async def _queue_notification(
+        self,
+        event: TransactionType,
+        user: User,
+        fund: Fund,
+        transaction: Transaction,
+        amount: Decimal,
+        session: Optional[AsyncIOMotorClientSession] = None
+    ) -> None:
+        """Write the notification to the outbox.
+        
+        Inside a transaction a failure aborts the whole operation; without one
+        the money movement already happened, so the failure is only logged.
+        """
+        try:
+            await outbox_repository.create(
+                event=event,
+                user_id=str(user.id),
+                fund_id=fund.fund_id,
+                transaction_id=transaction.transaction_id,
+                amount=amount,
+                balance=user.current_balance,
+                session=session
+            )
+        except Exception:
+            if session is not None:
+                raise
+            logger.exception("Error queueing notification for %s", transaction.transaction_id)
     
+    @traced()
     async def get_user_subscriptions(self, user_id: str) -> List[dict]:
         """Get user active subscriptions."""
         subscriptions = await subscription_repository.get_user_subscriptions(
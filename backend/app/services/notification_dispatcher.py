@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.tracing import tracer
+from app.models import NotificationOutbox, TransactionType
+from app.repositories.outbox_repository import outbox_repository
+from app.repositories.user_repository import user_repository
+from app.repositories.fund_repository import fund_repository
+from app.services.notification_service import notification_service
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    """Pool of asyncio workers draining the notification outbox."""
+    
+    def __init__(
+        self,
+        workers: int = settings.NOTIFICATION_WORKERS,
+        max_attempts: int = settings.NOTIFICATION_MAX_ATTEMPTS,
+        retry_base_seconds: float = settings.NOTIFICATION_RETRY_BASE_SECONDS,
+        retry_max_seconds: float = settings.NOTIFICATION_RETRY_MAX_SECONDS,
+        poll_interval_seconds: float = settings.NOTIFICATION_POLL_INTERVAL_SECONDS,
+        lease_seconds: int = settings.NOTIFICATION_LEASE_SECONDS
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+    
+    async def start(self) -> None:
+        """Start the worker tasks."""
+        if self._tasks:
+            return
+        
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"notification-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info("Notification dispatcher started with %d workers", self.workers)
+    
+    async def stop(self) -> None:
+        """Stop the workers, letting in-flight deliveries finish."""
+        self._stopping = True
+        if self._wakeup:
+            self._wakeup.set()
+        
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Notification dispatcher stopped")
+    
+    def notify(self) -> None:
+        """Wake idle workers after a new outbox entry is committed."""
+        if self._wakeup:
+            self._wakeup.set()
+    
+    def _retry_delay(self, attempts: int) -> float:
+        """Exponential backoff with jitter for the given attempt number."""
+        delay = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+        return delay * random.uniform(0.5, 1.0)
+    
+    async def _worker(self, worker_id: int) -> None:
+        # Lease owner, unique across processes and nodes
+        owner = f"{socket.gethostname()}:{os.getpid()}:{worker_id}"
+        while not self._stopping:
+            # Cleared before claiming, so a notify() racing with an empty
+            # claim still wakes the wait below
+            self._wakeup.clear()
+            try:
+                entry = await outbox_repository.claim_next(owner, self.lease_seconds)
+            except Exception as e:
+                logger.error("Notification worker %d could not claim an entry: %s", worker_id, e)
+                entry = None
+            
+            if entry is None:
+                await self._wait_for_work()
+                continue
+            
+            try:
+                # One trace per delivery; claims and idle polls are not traced
+                with tracer.start_span(
+                    "NotificationDispatcher.process", attributes={"outbox.id": str(entry.id)}
+                ):
+                    await self._process(entry)
+            except Exception:
+                # The lease expires and another worker picks the entry up again
+                logger.exception("Notification worker %d failed on %s", worker_id, entry.id)
+    
+    async def _wait_for_work(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def _process(self, entry: NotificationOutbox) -> None:
+        try:
+            sent = await self._deliver(entry)
+            error = None if sent else "Notification channel reported a failure"
+        except Exception as e:
+            sent = False
+            error = str(e)
+        
+        if sent:
+            recorded = await outbox_repository.mark_sent(entry)
+        elif entry.attempts >= self.max_attempts:
+            logger.error(
+                "Notification %s moved to dead letter after %d attempts: %s",
+                entry.id, entry.attempts, error
+            )
+            recorded = await outbox_repository.mark_failed(entry, error)
+        else:
+            retry_at = datetime.utcnow() + timedelta(seconds=self._retry_delay(entry.attempts))
+            logger.warning(
+                "Notification %s failed (attempt %d), retrying: %s", entry.id, entry.attempts, error
+            )
+            recorded = await outbox_repository.mark_failed(entry, error, retry_at=retry_at)
+        
+        if not recorded:
+            logger.warning(
+                "Notification %s outlived its %ss lease; "
+                "the outcome was left to the worker that reclaimed it",
+                entry.id, self.lease_seconds
+            )
+    
+    async def _deliver(self, entry: NotificationOutbox) -> bool:
+        user = await user_repository.get_by_id(entry.user_id)
+        fund = await fund_repository.get_by_id(int(entry.fund_id))
+        if not user or not fund:
+            raise LookupError("User or fund no longer exists")
+        
+        if entry.event == TransactionType.SUBSCRIPTION:
+            return await notification_service.send_subscription_notification(
+                user=user,
+                fund=fund,
+                amount=entry.amount,
+                new_balance=entry.balance
+            )
+        
+        return await notification_service.send_cancellation_notification(
+            user=user,
+            fund=fund,
+            amount=entry.amount,
+            new_balance=entry.balance
+        )
+
+
+# Create dispatcher instance
+notification_dispatcher = NotificationDispatcher()
@@ -6,21 +6,23 @@ from decimal import Decimal
 
 # Imports opcionales para modo gratuito
 try:
-    import aiosmtplib
     from email.mime.text import MIMEText
     from email.mime.multipart import MIMEMultipart
+    from app.services.smtp_pool import SMTPConnectionPool
     EMAIL_AVAILABLE = True
 except ImportError:
     EMAIL_AVAILABLE = False
 
 try:
-    from twilio.rest import Client as TwilioClient
+    import httpx
     SMS_AVAILABLE = True
 except ImportError:
     SMS_AVAILABLE = False
 
 from app.models import User, Fund, NotificationPreference
 from app.core.config import settings
+from app.core.metrics import time_notification
+from app.core.tracing import traced
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -33,16 +35,59 @@ GMAIL_PASSWORD = os.getenv("GMAIL_SMTP_PASSWORD")  # App password de Gmail
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")  
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
+TWILIO_MESSAGES_URL = "https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
 
 
 class NotificationService:
     """Service for sending notifications."""
     
+    def __init__(self):
+        self._smtp_pool: Optional["SMTPConnectionPool"] = None
+        self._sms_client: Optional["httpx.AsyncClient"] = None
+    
+    def _get_smtp_pool(self) -> "SMTPConnectionPool":
+        """Create the shared SMTP connection pool on first use."""
+        if self._smtp_pool is None:
+            self._smtp_pool = SMTPConnectionPool(
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_TLS_PORT if settings.SMTP_USE_TLS else settings.SMTP_PORT,
+                use_tls=settings.SMTP_USE_TLS,
+                username=GMAIL_USER,
+                password=GMAIL_PASSWORD,
+                max_size=settings.SMTP_POOL_SIZE,
+                max_messages_per_connection=settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+                idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT_SECONDS,
+                health_check_interval=settings.SMTP_POOL_HEALTH_CHECK_SECONDS
+            )
+        return self._smtp_pool
+    
+    def _get_sms_client(self) -> "httpx.AsyncClient":
+        """Create the shared keep-alive HTTP client for the Twilio REST API on first use."""
+        if self._sms_client is None:
+            self._sms_client = httpx.AsyncClient(
+                auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN),
+                timeout=settings.SMS_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.SMS_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SMS_MAX_CONNECTIONS
+                )
+            )
+        return self._sms_client
+    
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._smtp_pool is not None:
+            await self._smtp_pool.close()
+        if self._sms_client is not None:
+            await self._sms_client.aclose()
+    
+    @traced()
     async def send_subscription_notification(
         self, 
         user: User, 
         fund: Fund, 
-        amount: Decimal
+        amount: Decimal,
+        new_balance: Decimal
     ) -> bool:
         """Send notification when user subscribes to a fund."""
         message = (
@@ -50,18 +95,20 @@ class NotificationService:
             f"Estimado/a {user.full_name},\n\n"
             f"Su suscripción al fondo {fund.name} ha sido procesada exitosamente.\n"
             f"Monto invertido: COP ${amount:,.0f}\n"
-            f"Saldo disponible: COP ${user.current_balance - amount:,.0f}\n\n"
+            f"Saldo disponible: COP ${new_balance:,.0f}\n\n"
             f"Gracias por confiar en BTG Pactual.\n\n"
             f"Cordialmente,\nEquipo BTG Pactual"
         )
         
         return await self._send_notification(user, message, "Suscripción Exitosa - BTG Pactual")
     
+    @traced()
     async def send_cancellation_notification(
         self, 
         user: User, 
         fund: Fund, 
-        amount: Decimal
+        amount: Decimal,
+        new_balance: Decimal
     ) -> bool:
         """Send notification when user cancels a subscription."""
         message = (
@@ -69,7 +116,7 @@ class NotificationService:
             f"Estimado/a {user.full_name},\n\n"
             f"Su cancelación del fondo {fund.name} ha sido procesada exitosamente.\n"
             f"Monto reembolsado: COP ${amount:,.0f}\n"
-            f"Nuevo saldo disponible: COP ${user.current_balance + amount:,.0f}\n\n"
+            f"Nuevo saldo disponible: COP ${new_balance:,.0f}\n\n"
             f"Gracias por usar nuestros servicios.\n\n"
             f"Cordialmente,\nEquipo BTG Pactual"
         )
@@ -85,22 +132,28 @@ class NotificationService:
         """Send notification based on user preference."""
         try:
             if user.notification_preference == NotificationPreference.EMAIL:
-                return await self._send_email(user.email, message, subject)
+                return await self._send_email(user.email, subject, message)
             elif user.notification_preference == NotificationPreference.SMS:
                 if not user.phone_number:
                     logger.warning("📱 Número de teléfono no proporcionado")
                     return False
                 return await self._send_sms(user.phone_number, message)
             elif user.notification_preference == NotificationPreference.BOTH:
-                email_sent = await self._send_email(user.email, message, subject)
-                sms_sent = await self._send_sms(user.phone_number, message)
-                return email_sent or sms_sent  # Success if at least one succeeds
+                # Both channels are sent concurrently
+                results = await asyncio.gather(
+                    self._send_email(user.email, subject, message),
+                    self._send_sms(user.phone_number, message),
+                    return_exceptions=True
+                )
+                return any(result is True for result in results)  # Success if at least one succeeds
             
             return False
-        except Exception as e:
-            print(f"Error sending notification: {str(e)}")
+        except Exception:
+            logger.exception("Error sending notification")
             return False
     
+    @traced("NotificationService.send_email")
+    @time_notification("email")
     async def _send_email(self, to_email: str, subject: str, body: str) -> bool:
         """Enviar email usando Gmail SMTP GRATUITO o simulación"""
         
@@ -143,9 +196,8 @@ class NotificationService:
             """
             message.attach(MIMEText(html_body, "html"))
             
-            async with aiosmtplib.SMTP(hostname="smtp.gmail.com", port=465, use_tls=True) as server:
-                await server.login(GMAIL_USER, GMAIL_PASSWORD)
-                await server.send_message(message)
+            # Conexión reutilizada del pool (sin handshake TLS ni login por email)
+            await self._get_smtp_pool().send_message(message)
             
             logger.info(f"✅ Email GRATUITO enviado exitosamente a: {to_email} vía Gmail SMTP")
             logger.info(f"� Límite diario Gmail: 500 emails (100% gratis)")
@@ -154,10 +206,11 @@ class NotificationService:
         except Exception as e:
             logger.error(f"❌ Error enviando email: {str(e)}")
             logger.warning(f"🔧 Verifica tu configuración de Gmail App Password")
-            # Fallback a simulación si falla el envío real
-            logger.info(f"📧 [FALLBACK] Email simulado enviado a: {to_email}")
-            return True
+            # El worker del outbox reintenta el envío
+            return False
 
+    @traced("NotificationService.send_sms")
+    @time_notification("sms")
     async def _send_sms(self, phone: Optional[str], message: str) -> bool:
         """Enviar SMS usando Twilio FREE TIER (Crédito $15 USD gratis) o simulación"""
         
@@ -173,30 +226,31 @@ class NotificationService:
             logger.info(f"💰 Costo estimado: ~$0.057 USD por SMS en Colombia")
             return True
         
-        # Modo producción con Twilio FREE TIER
+        # Modo producción con Twilio FREE TIER (API REST, sin bloquear el event loop)
         try:
-            client = TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-            
             # Formatear mensaje para SMS con límite de caracteres
             sms_message = f"🏦 BTG Pactual\n{message[:140]}..."
             
-            message_obj = client.messages.create(
-                body=sms_message,
-                from_=TWILIO_PHONE_NUMBER,
-                to=phone
+            response = await self._get_sms_client().post(
+                TWILIO_MESSAGES_URL.format(account_sid=TWILIO_ACCOUNT_SID),
+                data={
+                    "Body": sms_message,
+                    "From": TWILIO_PHONE_NUMBER,
+                    "To": phone
+                }
             )
+            response.raise_for_status()
             
             logger.info(f"✅ SMS GRATUITO enviado exitosamente a: {phone}")
-            logger.info(f"📊 SID: {message_obj.sid}")
+            logger.info(f"📊 SID: {response.json().get('sid')}")
             logger.info(f"💰 Usando crédito FREE TIER de Twilio ($15 USD gratis)")
             return True
             
         except Exception as e:
             logger.error(f"❌ Error enviando SMS: {str(e)}")
             logger.warning(f"🔧 Verifica tu configuración de Twilio Free Tier")
-            # Fallback a simulación si falla el envío real
-            logger.info(f"📱 [FALLBACK] SMS simulado enviado a: {phone}")
-            return True
+            # El worker del outbox reintenta el envío
+            return False
 
 
 # Create service instance
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from email.message import Message
+from typing import Deque, Optional
+
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    """Authenticated SMTP connection plus the bookkeeping used to recycle it."""
+    
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.messages_sent = 0
+        self.last_used_at = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Pool of persistent, authenticated SMTP connections.
+    
+    Connections are reused until they have sent max_messages_per_connection
+    messages or stayed idle longer than idle_timeout. A connection idle for
+    more than health_check_interval is probed with NOOP before reuse.
+    """
+    
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        use_tls: bool = True,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        max_size: int = 4,
+        max_messages_per_connection: int = 100,
+        idle_timeout: float = 60.0,
+        health_check_interval: float = 15.0,
+        timeout: float = 30.0
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._idle: Deque[_PooledConnection] = deque()
+        self._slots = asyncio.Semaphore(max_size)
+        self.connections_opened = 0
+    
+    async def send_message(self, message: Message) -> None:
+        """Send a message on a pooled connection.
+        
+        A reused connection that turns out to be dropped by the server is
+        replaced once with a fresh one before giving up.
+        """
+        async with self._slots:
+            connection = await self._acquire()
+            try:
+                await connection.client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                await self._discard(connection)
+                if connection.messages_sent == 0:
+                    raise
+                connection = await self._connect()
+                try:
+                    await connection.client.send_message(message)
+                except Exception:
+                    await self._discard(connection)
+                    raise
+            except Exception:
+                await self._discard(connection)
+                raise
+            
+            await self._release(connection)
+    
+    async def close(self) -> None:
+        """Close all idle connections."""
+        while self._idle:
+            await self._discard(self._idle.pop())
+    
+    async def _acquire(self) -> _PooledConnection:
+        while self._idle:
+            # Most recently used first, so surplus connections age out
+            connection = self._idle.pop()
+            idle_for = time.monotonic() - connection.last_used_at
+            
+            if idle_for > self.idle_timeout or not connection.client.is_connected:
+                await self._discard(connection)
+                continue
+            
+            if idle_for > self.health_check_interval and not await self._is_healthy(connection):
+                await self._discard(connection)
+                continue
+            
+            return connection
+        
+        return await self._connect()
+    
+    async def _release(self, connection: _PooledConnection) -> None:
+        connection.messages_sent += 1
+        connection.last_used_at = time.monotonic()
+        
+        if connection.messages_sent >= self.max_messages_per_connection:
+            await self._discard(connection)
+            return
+        
+        self._idle.append(connection)
+    
+    async def _connect(self) -> _PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            use_tls=self.use_tls,
+            timeout=self.timeout
+        )
+        await client.connect()
+        if self.username and self.password:
+            await client.login(self.username, self.password)
+        
+        self.connections_opened += 1
+        logger.debug("Opened SMTP connection to %s:%s", self.hostname, self.port)
+        return _PooledConnection(client)
+    
+    async def _is_healthy(self, connection: _PooledConnection) -> bool:
+        try:
+            await connection.client.noop()
+            return True
+        except (aiosmtplib.SMTPException, OSError):
+            return False
+    
+    async def _discard(self, connection: _PooledConnection) -> None:
+        try:
+            await connection.client.quit()
+        except Exception:
+            connection.client.close()
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from app.core.cache import BloomFilter, cache_invalidation_bus
+from app.core.config import settings
+from app.core.tracing import tracer
+from app.repositories.revoked_token_repository import revoked_token_repository
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationService:
+    """Revocation checks backed by the revoked_tokens collection.
+    
+    A miss in the in-memory Bloom filter answers "not revoked" without a
+    database lookup; only possible hits are confirmed against the
+    collection. Revocations made on other workers reach the filter through
+    the broadcast bus (when enabled) or the next periodic rebuild, which
+    also drops expired ones. Refresh rotation does not depend on that
+    freshness: its unique revoke() insert rejects a reused token anyway.
+    """
+    
+    def __init__(
+        self,
+        rebuild_seconds: float = settings.TOKEN_REVOCATION_FILTER_REBUILD_SECONDS,
+        error_rate: float = settings.TOKEN_REVOCATION_FILTER_ERROR_RATE
+    ):
+        self.rebuild_seconds = rebuild_seconds
+        self.error_rate = error_rate
+        self._filter: Optional[BloomFilter] = None
+        self._added_during_rebuild: Optional[List[str]] = None
+        self._task: Optional[asyncio.Task] = None
+        cache_invalidation_bus.register("revoked_tokens", self._remember)
+    
+    async def start(self) -> None:
+        """Build the filter and schedule periodic rebuilds."""
+        await self.rebuild()
+        if self._task is None:
+            self._task = asyncio.create_task(self._rebuild_periodically(), name="token-revocation-filter")
+    
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+    
+    async def rebuild(self) -> None:
+        """Rebuild the filter from the revocations that have not expired."""
+        self._added_during_rebuild = []
+        try:
+            count = await revoked_token_repository.count()
+            # Leave headroom for revocations made before the next rebuild
+            new_filter = BloomFilter(capacity=max(count * 2, 1024), error_rate=self.error_rate)
+            async for jti in revoked_token_repository.iter_jtis():
+                new_filter.add(jti)
+            for jti in self._added_during_rebuild:
+                new_filter.add(jti)
+            self._filter = new_filter
+        finally:
+            self._added_during_rebuild = None
+    
+    def _remember(self, jti: str) -> None:
+        if self._filter is not None:
+            self._filter.add(jti)
+        if self._added_during_rebuild is not None:
+            self._added_during_rebuild.append(jti)
+    
+    async def revoke(self, jti: str, user_id: str, expires_at: datetime) -> bool:
+        """Revoke a token on every node.
+        
+        Returns False if it was already revoked, so concurrent callers can
+        tell which of them revoked it.
+        """
+        created = await revoked_token_repository.create(jti, user_id, expires_at)
+        self._remember(jti)
+        if created:
+            await cache_invalidation_bus.publish("revoked_tokens", jti)
+        return created
+    
+    async def is_revoked(self, jti: str) -> bool:
+        """Check whether a token is revoked, skipping the database on filter misses.
+        
+        Hits are confirmed, so the filter's false positives (about error_rate
+        of valid tokens) cost a lookup rather than a forced logout. Before
+        the first build every check goes to the collection.
+        """
+        if self._filter is not None and jti not in self._filter:
+            return False
+        return await revoked_token_repository.exists(jti)
+    
+    async def _rebuild_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.rebuild_seconds)
+            try:
+                with tracer.start_span("TokenRevocationService.rebuild"):
+                    await self.rebuild()
+            except Exception as e:
+                logger.warning("Could not rebuild token revocation filter: %s", e)
+
+
+# Create service instance
+token_revocation_service = TokenRevocationService()
@@ -1,63 +1,223 @@
-from typing import List, Optional
+import base64
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Type
 from decimal import Decimal
+from datetime import datetime, timezone
+
+from bson import ObjectId
 
 from fastapi import HTTPException, status
+from pydantic import BaseModel
 
+from app.api.schemas import ExportFormat
+from app.core.config import settings
+from app.core.money import parse_amount
+from app.core.tracing import traced, traced_stream
 from app.models import Transaction, TransactionType, TransactionStatus
 from app.repositories.transaction_repository import transaction_repository
 from app.repositories.user_repository import user_repository
 
 
+def _encode_cursor(direction: str, transaction: Transaction) -> str:
+    """Encode a keyset position as an opaque URL-safe token."""
+    raw = json.dumps({
+        "d": direction,
+        "t": transaction.created_at.isoformat(),
+        "id": str(transaction.id)
+    }, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, Tuple[datetime, ObjectId]]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        direction = data["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return direction, (datetime.fromisoformat(data["t"]), ObjectId(data["id"]))
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+EXPORT_FIELDS = (
+    "id", "transaction_id", "fund_id", "type", "amount", "status",
+    "description", "created_at", "updated_at", "completed_at"
+)
+
+# Rows are buffered into chunks of roughly this size before being sent
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Make a datetime timezone-aware, reading naive values as UTC like the stored ones."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _export_row(document: dict) -> dict:
+    """Flatten a raw transaction document into plain export values."""
+    row = {}
+    for field in EXPORT_FIELDS:
+        value = document.get("_id" if field == "id" else field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif value is not None and field == "amount":
+            # Amounts keep their exact decimal representation
+            value = str(parse_amount(value))
+        elif value is not None and field == "id":
+            value = str(value)
+        row[field] = value
+    return row
+
+
 class TransactionService:
     """Service for transaction operations."""
     
+    @traced()
     async def get_transaction_history(
         self,
         user_id: str,
         page: int = 1,
         size: int = 10,
         transaction_type: Optional[TransactionType] = None,
-        transaction_status: Optional[TransactionStatus] = None
+        transaction_status: Optional[TransactionStatus] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        projection: Optional[Type[BaseModel]] = None
     ) -> dict:
-        """Get user transaction history with pagination."""
+        """Get user transaction history with pagination.
+        
+        When cursor is given the page is read by keyset and page is ignored;
+        otherwise the classic page-number mode is used. Both modes return
+        next_cursor/prev_cursor for continuing by keyset. With include_total
+        False the count query is skipped and total/pages are None. A
+        projection model limits the fetched fields; it must keep id and
+        created_at for the cursors.
+        """
         # Validate user exists
-        user = await user_repository.get_by_id(user_id)
+        user = await user_repository.get_active_by_id(user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
-        # Calculate pagination
-        skip = (page - 1) * size
-        
-        # Get transactions
-        transactions = await transaction_repository.get_user_transactions(
-            user_id=user_id,
-            skip=skip,
-            limit=size,
-            transaction_type=transaction_type,
-            status=transaction_status
-        )
-        
-        # Get total count
-        total = await transaction_repository.count_user_transactions(
-            user_id=user_id,
-            transaction_type=transaction_type,
-            status=transaction_status
-        )
+        if cursor:
+            direction, position = _decode_cursor(cursor)
+            transactions, has_more = await transaction_repository.get_user_transactions_page(
+                user_id=user_id,
+                limit=size,
+                after=position if direction == "next" else None,
+                before=position if direction == "prev" else None,
+                transaction_type=transaction_type,
+                status=transaction_status,
+                projection=projection
+            )
+            # The cursor row itself lies on the side we came from
+            has_next = has_more if direction == "next" else True
+            has_prev = has_more if direction == "prev" else True
+            page = None
+        else:
+            # Calculate pagination
+            skip = (page - 1) * size
+            
+            # Get transactions; one extra row tells whether a next page exists
+            transactions = await transaction_repository.get_user_transactions(
+                user_id=user_id,
+                skip=skip,
+                limit=size + 1,
+                transaction_type=transaction_type,
+                status=transaction_status,
+                projection=projection
+            )
+            has_next = len(transactions) > size
+            has_prev = page > 1
+            transactions = transactions[:size]
         
-        # Calculate pages
-        pages = (total + size - 1) // size
+        total = pages = None
+        if include_total:
+            # Get total count
+            total = await transaction_repository.count_user_transactions(
+                user_id=user_id,
+                transaction_type=transaction_type,
+                status=transaction_status
+            )
+            
+            # Calculate pages
+            pages = (total + size - 1) // size
         
         return {
             "transactions": transactions,
             "total": total,
             "page": page,
             "size": size,
-            "pages": pages
+            "pages": pages,
+            "next_cursor": _encode_cursor("next", transactions[-1]) if transactions and has_next else None,
+            "prev_cursor": _encode_cursor("prev", transactions[0]) if transactions and has_prev else None
         }
     
+    async def export_transactions(
+        self,
+        user_id: str,
+        export_format: ExportFormat = ExportFormat.NDJSON,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream a user's whole transaction history as NDJSON or CSV chunks.
+
+        Not traced() like its neighbours: the span covers the streamed body.
+        """
+        # Mixing naive and aware bounds must not fail the comparison below
+        date_from, date_to = _as_utc(date_from), _as_utc(date_to)
+        if date_from and date_to and date_from >= date_to:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_from must be earlier than date_to"
+            )
+        
+        documents = transaction_repository.iter_user_transactions(
+            user_id,
+            date_from=date_from,
+            date_to=date_to,
+            batch_size=settings.TRANSACTION_EXPORT_BATCH_SIZE
+        )
+        
+        async def generate() -> AsyncIterator[bytes]:
+            buffer = io.StringIO()
+            writer = None
+            if export_format == ExportFormat.CSV:
+                writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+                writer.writeheader()
+            
+            async for document in documents:
+                row = _export_row(document)
+                if writer:
+                    writer.writerow(row)
+                else:
+                    buffer.write(json.dumps(row, ensure_ascii=False))
+                    buffer.write("\n")
+                
+                if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+            
+            if buffer.tell():
+                yield buffer.getvalue().encode("utf-8")
+        
+        return traced_stream("TransactionService.export_transactions", generate())
+    
+    @traced()
     async def get_transaction_by_id(
         self,
         transaction_id: str,
@@ -80,9 +240,17 @@ class TransactionService:
         
         return transaction
     
-    async def get_recent_transactions(self, limit: int = 10) -> List[Transaction]:
+    @traced()
+    async def get_recent_transactions(
+        self,
+        limit: int = 10,
+        projection: Optional[Type[BaseModel]] = None
+    ) -> List[Transaction]:
         """Get recent transactions (admin only)."""
-        return await transaction_repository.get_recent_transactions(limit=limit)
+        return await transaction_repository.get_recent_transactions(
+            limit=limit,
+            projection=projection
+        )
 
 
 # Create service instance
@@ -0,0 +1,80 @@
+"""Rendering a 100-row transaction page: stdlib CustomJSONEncoder vs orjson dumps.
+
+Run from backend/:  python -m benchmarks.json_encoder_benchmark [rows] [iterations]
+
+Rows mirror what the history endpoint returns, with Decimal amounts and
+datetimes that both encoders have to convert through their default hook.
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from bson import ObjectId
+
+from app.core.json_encoder import CustomJSONEncoder, dumps
+
+
+def _page(rows: int) -> dict:
+    created = datetime(2024, 1, 1, 9, 30)
+    return {
+        "items": [
+            {
+                "id": str(ObjectId()),
+                "transaction_id": f"TXN_20240101_{i:08X}",
+                "user_id": str(ObjectId()),
+                "fund_id": i % 5 + 1,
+                "type": "subscription" if i % 2 else "cancellation",
+                "amount": Decimal("75000.00") + i,
+                "status": "completed",
+                "description": f"Suscripción al fondo {i % 5 + 1}",
+                "created_at": created + timedelta(minutes=i),
+                "updated_at": created + timedelta(minutes=i),
+                "completed_at": created + timedelta(minutes=i, seconds=1),
+            }
+            for i in range(rows)
+        ],
+        "total": rows,
+        "has_more": False,
+        "next_cursor": None,
+    }
+
+
+def _stdlib(content: dict) -> bytes:
+    # What CustomJSONResponse rendered before orjson
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        cls=CustomJSONEncoder,
+    ).encode("utf-8")
+
+
+def _time(render, content: dict, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render(content)
+    return (time.perf_counter() - start) / iterations
+
+
+def main(rows: int, iterations: int) -> None:
+    page = _page(rows)
+    assert dumps(page) == _stdlib(page)
+
+    baseline = _time(_stdlib, page, iterations)
+    fast = _time(dumps, page, iterations)
+
+    print(f"{rows} rows, {len(dumps(page)):,} bytes, {iterations} iterations")
+    print(f"  stdlib CustomJSONEncoder: {baseline * 1e6:8.1f}us per page")
+    print(f"  orjson dumps:             {fast * 1e6:8.1f}us per page")
+    print(f"  speedup: {baseline / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    )
@@ -0,0 +1,78 @@
+"""Building 10k Transaction documents eagerly vs with Beanie's lazy_parse.
+
+Run from backend/:  python -m benchmarks.lazy_parse_benchmark [documents]
+
+Raw rows are shaped like what pymongo returns (ObjectId, Decimal128,
+datetime) and go through the same parse_obj call Beanie's cursors use.
+Lazy parsing only saves work for fields nobody reads, so each mode is
+timed both for building the documents and for building them and then
+reading every field, as the history endpoint's serializer does.
+
+Result on Beanie 1.23 (the reason the LAZY_PARSE_READS flag was dropped):
+lazy_model builds a TypeAdapter on every first field access, so lazy
+parsing lost on both counts, e.g. build 348ms vs 496ms and build + read
+581ms vs 25,945ms for eager vs lazy.
+"""
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+
+from beanie import init_beanie
+from beanie.odm.utils.parsing import parse_obj
+from bson import Decimal128, ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from app.api.schemas import TransactionResponse
+from app.api.serializers import DocumentSerializer
+from app.models import Transaction
+
+
+def _raw(count: int) -> list:
+    created = datetime(2024, 1, 1, 9, 30)
+    return [
+        {
+            "_id": ObjectId(),
+            "transaction_id": f"TXN_20240101_{i:08X}",
+            "user_id": "65f1a2b3c4d5e6f708091a2c",
+            "fund_id": str(i % 5 + 1),
+            "type": "subscription" if i % 2 else "cancellation",
+            "amount": Decimal128(f"{75000 + i}.00"),
+            "status": "completed",
+            "description": f"Suscripción al fondo {i % 5 + 1}",
+            "created_at": created + timedelta(minutes=i),
+            "updated_at": created + timedelta(minutes=i),
+            "completed_at": created + timedelta(minutes=i, seconds=1),
+        }
+        for i in range(count)
+    ]
+
+
+def _time(work) -> float:
+    start = time.perf_counter()
+    work()
+    return time.perf_counter() - start
+
+
+async def main(count: int) -> None:
+    # Beanie needs an initialized collection to build documents; nothing is queried
+    await init_beanie(database=AsyncMongoMockClient()["benchmark"], document_models=[Transaction])
+    raw = _raw(count)
+    serializer = DocumentSerializer(TransactionResponse)
+
+    def build(lazy: bool) -> list:
+        return [parse_obj(Transaction, row, lazy_parse=lazy) for row in raw]
+
+    # Warm up validators and lazy_model's per-field adapters
+    build(False)
+    serializer.dump_all(build(True))
+
+    print(f"{count:,} documents")
+    for label, lazy in (("eager", False), ("lazy_parse", True)):
+        built = _time(lambda: build(lazy))
+        read = _time(lambda: serializer.dump_all(build(lazy)))
+        print(f"  {label:<10}  build {built * 1000:7.1f}ms   build + read all fields {read * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
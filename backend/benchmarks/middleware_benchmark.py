@@ -0,0 +1,117 @@
+"""Request latency through BaseHTTPMiddleware vs the pure ASGI middleware.
+
+Run from backend/:  python -m benchmarks.middleware_benchmark [requests]
+
+Drives an in-process app with direct ASGI calls on /health and on a
+streaming endpoint of 100 chunks, once behind the BaseHTTPMiddleware
+logging and security headers middleware this repo used before and once
+behind LoggingMiddleware and SecurityHeadersMiddleware. Log output is
+disabled so only the middleware mechanics are compared.
+"""
+import asyncio
+import logging
+import statistics
+import sys
+import time
+from typing import Callable
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.middleware import LoggingMiddleware, SecurityHeadersMiddleware
+
+CHUNKS = 100
+
+
+class BaseHTTPLoggingMiddleware(BaseHTTPMiddleware):
+    # LoggingMiddleware before it was rewritten as pure ASGI
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        start_time = time.time()
+        logging.getLogger("btg_pactual").info(f"Request: {request.method} {request.url.path}")
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        logging.getLogger("btg_pactual").info(f"Response: {response.status_code} {process_time:.4f}s")
+        response.headers["X-Process-Time"] = str(process_time)
+        return response
+
+
+class BaseHTTPSecurityHeadersMiddleware(BaseHTTPMiddleware):
+    # SecurityHeadersMiddleware before it was rewritten as pure ASGI
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
+        return response
+
+
+def _app(security, logging_middleware) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            for i in range(CHUNKS):
+                yield b'{"row":%d}\n' % i
+        return StreamingResponse(body(), media_type="application/x-ndjson")
+
+    app.add_middleware(security)
+    app.add_middleware(logging_middleware)
+    return app
+
+
+async def _request(app: FastAPI, path: str) -> float:
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "path": path,
+        "raw_path": path.encode(), "query_string": b"", "headers": [],
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80), "scheme": "http",
+    }
+    request_sent = False
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        pass
+
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+async def _measure(label: str, app: FastAPI, path: str, requests: int) -> float:
+    for _ in range(50):
+        await _request(app, path)
+    latencies = sorted([await _request(app, path) for _ in range(requests)])
+    median = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"  {label:<28} median {median * 1e6:7.1f}us  p99 {p99 * 1e6:7.1f}us")
+    return median
+
+
+async def main(requests: int) -> None:
+    logging.disable(logging.INFO)
+    before = _app(BaseHTTPSecurityHeadersMiddleware, BaseHTTPLoggingMiddleware)
+    after = _app(SecurityHeadersMiddleware, LoggingMiddleware)
+
+    print(f"{requests} sequential requests per case")
+    for path in ("/health", "/stream"):
+        baseline = await _measure(f"{path} BaseHTTPMiddleware", before, path, requests)
+        pure = await _measure(f"{path} pure ASGI", after, path, requests)
+        print(f"  {path} speedup: {baseline / pure:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
@@ -0,0 +1,68 @@
+"""Event-loop lag during a login burst: inline bcrypt vs PasswordHasher.
+
+Run from backend/:  python -m benchmarks.password_hasher_benchmark [logins]
+
+A probe task sleeps in 5ms steps and records how late it wakes up; that
+delay is what every other in-flight request experiences while the
+verifications run.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from app.core.security import PasswordHasher, Security
+
+PROBE_INTERVAL = 0.005
+
+
+async def _probe(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def _measure(label: str, verify, logins: int, hashed: str) -> None:
+    lags: list = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lags, stop))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(verify("Admin123!", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    assert all(results)
+
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(f"  {label:<22} {elapsed:6.2f}s  {logins / elapsed:6.1f} logins/s  "
+          f"lag median {statistics.median(lags_ms):7.1f}ms  p99 {p99:7.1f}ms  max {lags_ms[-1]:7.1f}ms")
+
+
+async def main(logins: int) -> None:
+    hashed = Security.get_password_hash("Admin123!")
+    workers = os.cpu_count() or 1
+
+    async def inline(plain: str, hashed_password: str) -> bool:
+        # What authenticate did before: bcrypt on the event loop
+        return Security.verify_password(plain, hashed_password)
+
+    threads = PasswordHasher(workers=workers, max_pending=logins, use_processes=False)
+    processes = PasswordHasher(workers=workers, max_pending=logins, use_processes=True)
+    # Start the process pool before timing
+    await processes.verify("Admin123!", hashed)
+
+    print(f"{logins} concurrent logins, {workers} workers")
+    await _measure("inline (before)", inline, logins, hashed)
+    await _measure("thread executor", threads.verify, logins, hashed)
+    await _measure("process executor", processes.verify, logins, hashed)
+    threads.shutdown()
+    processes.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 32))
@@ -0,0 +1,76 @@
+"""Per-row cost of response_model re-validation vs DocumentSerializer.
+
+Run from backend/:  python -m benchmarks.serializer_benchmark [rows] [iterations]
+
+The baseline is what FastAPI does for response_model=TransactionResponse:
+validate each loaded document into the schema, then dump it in JSON mode.
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from app.api.schemas import TransactionResponse
+from app.api.serializers import DocumentSerializer
+from app.models import TransactionStatus, TransactionType
+
+
+def _rows(count: int) -> list:
+    # Attribute types as a loaded Transaction document holds them
+    created = datetime(2024, 1, 1, 9, 30)
+    return [
+        SimpleNamespace(
+            id=ObjectId(),
+            transaction_id=f"TXN_20240101_{i:08X}",
+            user_id=str(ObjectId()),
+            fund_id=str(i % 5 + 1),
+            type=TransactionType.SUBSCRIPTION if i % 2 else TransactionType.CANCELLATION,
+            amount=Decimal("75000.00") + i,
+            status=TransactionStatus.COMPLETED,
+            description=f"Suscripción al fondo {i % 5 + 1}",
+            created_at=created + timedelta(minutes=i),
+            updated_at=created + timedelta(minutes=i),
+            completed_at=created + timedelta(minutes=i, seconds=1),
+        )
+        for i in range(count)
+    ]
+
+
+def _revalidate(rows: list) -> list:
+    return [
+        TransactionResponse.model_validate(row, from_attributes=True).model_dump(
+            mode="json", by_alias=True
+        )
+        for row in rows
+    ]
+
+
+def _time(render, rows: list, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        render(rows)
+    return (time.perf_counter() - start) / iterations / len(rows)
+
+
+def main(count: int, iterations: int) -> None:
+    rows = _rows(count)
+    serializer = DocumentSerializer(TransactionResponse)
+    assert serializer.dump_all(rows) == _revalidate(rows)
+
+    baseline = _time(_revalidate, rows, iterations)
+    direct = _time(serializer.dump_all, rows, iterations)
+
+    print(f"{count} rows, {iterations} iterations")
+    print(f"  validate + model_dump: {baseline * 1e6:6.2f}us per row")
+    print(f"  DocumentSerializer:    {direct * 1e6:6.2f}us per row")
+    print(f"  saved {(baseline - direct) * 1e6:.2f}us per row ({baseline / direct:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    )
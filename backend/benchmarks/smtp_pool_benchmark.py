@@ -0,0 +1,76 @@
+"""Per-message SMTP connections vs SMTPConnectionPool against a local aiosmtpd.
+
+Run from backend/:  python -m benchmarks.smtp_pool_benchmark [messages] [concurrency]
+
+The stand-in server speaks plain SMTP on localhost, so the gap shown here is
+only the TCP connect, greeting, EHLO and QUIT saved per message. Against
+Gmail each new connection also pays a TLS handshake and a login round trip.
+"""
+import asyncio
+import sys
+import time
+from email.mime.text import MIMEText
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+
+from app.services.smtp_pool import SMTPConnectionPool
+
+HOST = "127.0.0.1"
+PORT = 8025
+
+
+def _message(i: int) -> MIMEText:
+    message = MIMEText(f"<p>Notificación {i}</p>", "html")
+    message["From"] = "bench@btgpactual.com"
+    message["To"] = f"client{i}@example.com"
+    message["Subject"] = "Benchmark"
+    return message
+
+
+async def _run(send, messages: int, concurrency: int) -> float:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with slots:
+            await send(_message(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(messages)))
+    return time.perf_counter() - start
+
+
+async def main(messages: int, concurrency: int) -> None:
+    async def per_message(message: MIMEText) -> None:
+        # What _send_email did before the pool: one connection per email
+        async with aiosmtplib.SMTP(hostname=HOST, port=PORT, use_tls=False) as client:
+            await client.send_message(message)
+
+    pool = SMTPConnectionPool(hostname=HOST, port=PORT, use_tls=False, max_size=concurrency)
+
+    # Warm up both paths once
+    await _run(per_message, concurrency, concurrency)
+    await _run(pool.send_message, concurrency, concurrency)
+
+    baseline = await _run(per_message, messages, concurrency)
+    pooled = await _run(pool.send_message, messages, concurrency)
+    await pool.close()
+
+    print(f"{messages} messages, concurrency {concurrency}")
+    print(f"  connection per message: {baseline:.3f}s  ({messages / baseline:,.0f} msg/s)")
+    print(f"  pooled connections:     {pooled:.3f}s  ({messages / pooled:,.0f} msg/s, "
+          f"{pool.connections_opened} connections opened)")
+    print(f"  speedup: {baseline / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    controller = Controller(Sink(), hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        asyncio.run(main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 4
+        ))
+    finally:
+        controller.stop()
@@ -5,6 +5,7 @@
 db = db.getSiblingDB("btg_pactual");
 
 // Create collections with validation
+// Amounts are Decimal128, or int32/int64 cents when MONEY_STORAGE=minor_units
 db.createCollection("users", {
   validator: {
     $jsonSchema: {
@@ -17,7 +18,7 @@ db.createCollection("users", {
         phone_number: { bsonType: "string" },
         role: { enum: ["admin", "client"] },
         is_active: { bsonType: "bool" },
-        current_balance: { bsonType: "decimal" },
+        current_balance: { bsonType: ["decimal", "long", "int"] },
         notification_preference: { enum: ["email", "sms"] },
         created_at: { bsonType: "date" },
         updated_at: { bsonType: "date" },
@@ -35,7 +36,7 @@ db.createCollection("funds", {
         name: { bsonType: "string" },
         description: { bsonType: "string" },
         category: { bsonType: "string" },
-        minimum_amount: { bsonType: "decimal" },
+        minimum_amount: { bsonType: ["decimal", "long", "int"] },
         is_active: { bsonType: "bool" },
         created_at: { bsonType: "date" },
       },
@@ -53,7 +54,7 @@ db.createCollection("transactions", {
         fund_id: { bsonType: "string" },
         subscription_id: { bsonType: "string" },
         type: { enum: ["subscription", "cancellation"] },
-        amount: { bsonType: "decimal" },
+        amount: { bsonType: ["decimal", "long", "int"] },
         status: { enum: ["pending", "completed", "failed"] },
         description: { bsonType: "string" },
         created_at: { bsonType: "date" },
@@ -71,7 +72,7 @@ db.createCollection("user_fund_subscriptions", {
       properties: {
         user_id: { bsonType: "string" },
         fund_id: { bsonType: "string" },
-        subscription_amount: { bsonType: "decimal" },
+        subscription_amount: { bsonType: ["decimal", "long", "int"] },
         is_active: { bsonType: "bool" },
         subscribed_at: { bsonType: "date" },
         cancelled_at: { bsonType: ["date", "null"] },
@@ -94,6 +95,7 @@ db.transactions.createIndex({ fund_id: 1 });
 db.transactions.createIndex({ type: 1 });
 db.transactions.createIndex({ status: 1 });
 db.transactions.createIndex({ created_at: -1 });
+db.transactions.createIndex({ user_id: 1, created_at: -1, _id: -1 });
 
 db.user_fund_subscriptions.createIndex({ user_id: 1 });
 db.user_fund_subscriptions.createIndex({ fund_id: 1 });
@@ -1,17 +1,15 @@
 import logging
-import sys
-import json
 from decimal import InvalidOperation
 
 from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse as BaseJSONResponse
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from fastapi.encoders import jsonable_encoder
 
 from app.api.v1 import api_router
 from app.core.config import settings
-from app.core.database import connect_to_mongo, close_mongo_connection
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
+from app.core.cache import cache_invalidation_bus
 from app.core.exceptions import (
     BTGPactualException,
     btg_pactual_exception_handler,
@@ -20,32 +18,24 @@ from app.core.exceptions import (
     general_exception_handler,
     decimal_exception_handler
 )
-from app.core.middleware import SecurityHeadersMiddleware, LoggingMiddleware, setup_cors
-from app.core.json_encoder import CustomJSONEncoder
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.core.metrics import mark_process_dead, metrics_response
+from app.core.middleware import SecurityHeadersMiddleware, LoggingMiddleware, MetricsMiddleware, QueryMonitorMiddleware, TracingMiddleware, setup_cors
+from app.core.json_encoder import CustomJSONResponse
+from app.core.tracing import setup_tracing, shutdown_tracing
+from app.core.security import password_hasher
+from app.services.notification_dispatcher import notification_dispatcher
+from app.services.notification_service import notification_service
+from app.services.token_revocation_service import token_revocation_service
+from app.repositories.fund_repository import fund_repository
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.LOG_LEVEL.upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stdout
-)
+setup_logging()
+setup_tracing()
 
 logger = logging.getLogger(__name__)
 
 
-# Custom JSON Response class
-class CustomJSONResponse(BaseJSONResponse):
-    def render(self, content) -> bytes:
-        return json.dumps(
-            content,
-            ensure_ascii=False,
-            allow_nan=False,
-            indent=None,
-            separators=(",", ":"),
-            cls=CustomJSONEncoder,
-        ).encode("utf-8")
-
-
 # Create FastAPI application with custom JSON encoder
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -62,6 +52,10 @@ setup_cors(app)
 # Add custom middleware
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(LoggingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryMonitorMiddleware)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
 
 # Exception handlers
 app.add_exception_handler(BTGPactualException, btg_pactual_exception_handler)
@@ -77,17 +71,30 @@ app.include_router(api_router, prefix="/api/v1")
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup."""
-    print("🚀 Iniciando BTG Pactual Funds Management API...")
+    logger.info("🚀 Iniciando BTG Pactual Funds Management API...")
     await connect_to_mongo()
-    print("✅ Aplicación iniciada correctamente")
+    await cache_invalidation_bus.start(await get_database())
+    await token_revocation_service.start()
+    await fund_repository.catalog.start()
+    await notification_dispatcher.start()
+    logger.info("✅ Aplicación iniciada correctamente")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up on application shutdown."""
-    print("🛑 Cerrando BTG Pactual Funds Management API...")
+    logger.info("🛑 Cerrando BTG Pactual Funds Management API...")
+    await notification_dispatcher.stop()
+    await token_revocation_service.stop()
+    await fund_repository.catalog.stop()
+    await cache_invalidation_bus.stop()
+    await notification_service.close()
+    password_hasher.shutdown()
     await close_mongo_connection()
-    print("✅ Aplicación cerrada correctamente")
+    mark_process_dead()
+    shutdown_tracing()
+    logger.info("✅ Aplicación cerrada correctamente")
+    shutdown_logging()
 
 
 @app.get("/", tags=["Health"])
@@ -102,6 +109,12 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics exposition."""
+    return metrics_response()
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
     """Detailed health check endpoint."""
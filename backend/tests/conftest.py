@@ -0,0 +1,34 @@
+import os
+
+# Settings are read at import time and SECRET_KEY has no default
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import pytest_asyncio  # noqa: E402
+from beanie import init_beanie  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+
+@pytest_asyncio.fixture
+async def database():
+    """A fresh in-memory database with the default funds, wired into the app."""
+    from app.core.config import settings
+    from app.core.database import db
+    from app.models import Fund, NotificationOutbox, RevokedToken, Transaction, User, UserFundSubscription
+    from app.repositories.fund_repository import fund_repository
+    from app.repositories.user_repository import user_repository
+
+    db.client = AsyncMongoMockClient()
+    db.transactions_enabled = False
+    await init_beanie(
+        database=db.client[settings.DATABASE_NAME],
+        document_models=[User, Fund, Transaction, UserFundSubscription, NotificationOutbox, RevokedToken]
+    )
+    fund_repository.catalog.invalidate()
+    user_repository._active_users.clear()
+    user_repository._token_versions.clear()
+    await fund_repository.initialize_funds()
+
+    yield db.client[settings.DATABASE_NAME]
+
+    fund_repository.catalog.invalidate()
+    db.client = None
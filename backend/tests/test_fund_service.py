@@ -0,0 +1,136 @@
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+
+from app.models import Transaction, UserFundSubscription
+from app.repositories.subscription_repository import subscription_repository
+from app.repositories.transaction_repository import transaction_repository
+from app.repositories.user_repository import user_repository
+from app.services.fund_service import fund_service
+
+FUND_ID = 1  # FPV_BTG_PACTUAL_RECAUDADORA, minimum COP 75.000
+
+
+class Balances:
+    """Stand-in for the conditional $inc balance updates.
+
+    mongomock cannot compare or increment Decimal128 values, so the debit
+    and credit are applied here with the same semantics: one atomic step,
+    and a debit only when the balance covers it.
+    """
+
+    def __init__(self):
+        self.balances = {}
+
+    async def debit_balance(self, user_id, amount, session=None):
+        if self.balances.get(user_id, Decimal("-1")) < amount:
+            return None
+        return await self._add(user_id, -amount)
+
+    async def credit_balance(self, user_id, amount, session=None):
+        if user_id not in self.balances:
+            return None
+        return await self._add(user_id, amount)
+
+    async def _add(self, user_id, delta):
+        self.balances[user_id] += delta
+        user = await user_repository.get_by_id(user_id)
+        return user.model_copy(update={"current_balance": self.balances[user_id]})
+
+
+@pytest_asyncio.fixture
+async def balances(database, monkeypatch):
+    balances = Balances()
+    monkeypatch.setattr(user_repository, "debit_balance", balances.debit_balance)
+    monkeypatch.setattr(user_repository, "credit_balance", balances.credit_balance)
+    return balances
+
+
+@pytest_asyncio.fixture
+async def user(balances):
+    user = await user_repository.create(
+        email="cliente@test.com", password="Test123!", full_name="Cliente Prueba"
+    )
+    balances.balances[str(user.id)] = user.current_balance
+    return user
+
+
+@pytest.fixture
+def balance_of(balances):
+    return lambda user: balances.balances[str(user.id)]
+
+
+@pytest.mark.asyncio
+async def test_subscribe_and_cancel_move_the_balance(user, balance_of):
+    user_id = str(user.id)
+
+    result = await fund_service.subscribe_to_fund(user_id, FUND_ID, Decimal("100000"))
+    assert result["new_balance"] == Decimal("400000")
+    assert balance_of(user) == Decimal("400000")
+
+    result = await fund_service.cancel_subscription(user_id, FUND_ID)
+    assert result["refunded_amount"] == Decimal("100000")
+    assert balance_of(user) == Decimal("500000")
+    assert await Transaction.find(Transaction.user_id == user_id).count() == 2
+
+
+@pytest.mark.asyncio
+async def test_duplicate_subscription_is_refunded(user, balance_of):
+    user_id = str(user.id)
+    await fund_service.subscribe_to_fund(user_id, FUND_ID, Decimal("100000"))
+
+    with pytest.raises(HTTPException) as error:
+        await fund_service.subscribe_to_fund(user_id, FUND_ID, Decimal("100000"))
+
+    assert error.value.status_code == 400
+    assert balance_of(user) == Decimal("400000")
+
+
+@pytest.mark.asyncio
+async def test_cancel_during_unfunded_subscribe_refunds_nothing(user, balance_of, monkeypatch):
+    user_id = str(user.id)
+    debit_balance = user_repository.debit_balance
+    cancellations = []
+
+    async def cancel_then_debit(*args, **kwargs):
+        # A cancellation landing while the subscription is being written
+        try:
+            await fund_service.cancel_subscription(user_id, FUND_ID)
+            cancellations.append("refunded")
+        except HTTPException as e:
+            cancellations.append(e.status_code)
+        return await debit_balance(*args, **kwargs)
+
+    monkeypatch.setattr(user_repository, "debit_balance", cancel_then_debit)
+
+    with pytest.raises(HTTPException) as error:
+        await fund_service.subscribe_to_fund(user_id, FUND_ID, Decimal("900000"))
+
+    assert error.value.status_code == 400
+    assert cancellations == [404]
+    assert balance_of(user) == Decimal("500000")
+    assert await UserFundSubscription.find_all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_record_does_not_refund_twice_after_a_cancel(user, balance_of, monkeypatch):
+    user_id = str(user.id)
+    create_transaction = transaction_repository.create
+
+    async def cancel_then_fail(*args, **kwargs):
+        if kwargs.get("transaction_type") == "subscription":
+            # The subscription exists and is funded; a cancellation refunds it
+            await fund_service.cancel_subscription(user_id, FUND_ID)
+            raise RuntimeError("transactions collection unavailable")
+        return await create_transaction(*args, **kwargs)
+
+    monkeypatch.setattr(transaction_repository, "create", cancel_then_fail)
+
+    with pytest.raises(HTTPException) as error:
+        await fund_service.subscribe_to_fund(user_id, FUND_ID, Decimal("100000"))
+
+    assert error.value.status_code == 500
+    assert balance_of(user) == Decimal("500000")
+    assert await subscription_repository.get_by_user_and_fund(user_id, FUND_ID) is None
@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from bson import Decimal128, ObjectId
+
+from app.core.json_encoder import CustomJSONEncoder, CustomJSONResponse, dumps
+
+
+def stdlib_dumps(content) -> bytes:
+    """What CustomJSONResponse rendered before orjson."""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        cls=CustomJSONEncoder,
+    ).encode("utf-8")
+
+
+TRANSACTION = {
+    "_id": ObjectId("65f1a2b3c4d5e6f708091a2b"),
+    "transaction_id": "TXN_20240101_ABCDEF12",
+    "user_id": "65f1a2b3c4d5e6f708091a2c",
+    "fund_id": 3,
+    "type": "subscription",
+    "amount": Decimal("125000.50"),
+    "status": "completed",
+    "description": "Suscripción al fondo DEUDAPRIVADA — señal ✓",
+    "created_at": datetime(2024, 1, 1, 13, 45, 12, 123456),
+    "completed_at": None,
+}
+
+
+@pytest.mark.parametrize("content", [
+    TRANSACTION,
+    [TRANSACTION] * 3,
+    {"items": [TRANSACTION], "total": 1, "has_more": False, "next_cursor": None},
+    {"decimal128": Decimal128("75000.00"), "small": Decimal("0.1"), "zero": Decimal("0")},
+    {"negative": Decimal("-42.75"), "whole": Decimal("500000")},
+    {"utc": datetime(2024, 6, 30, 23, 59, 59, tzinfo=timezone.utc)},
+    {"bogota": datetime(2024, 6, 30, 18, 0, tzinfo=timezone(timedelta(hours=-5)))},
+    {"midnight": datetime(2024, 2, 29)},
+    {"float": 0.1, "int": 2 ** 53, "bool": True, "none": None},
+    {"nested": {"deep": [{"deeper": [1, "dos", 3.5, None]}]}},
+    {1: "int key", "quote\"and\\slash": "tab\tnewline\n"},
+    {"wide_int": 2 ** 70},
+    {"emoji": "💰", "control": "\u0001"},
+    [],
+    {},
+    "plain string",
+])
+def test_dumps_matches_stdlib_encoder(content):
+    assert dumps(content) == stdlib_dumps(content)
+
+
+def test_response_body_matches_stdlib_encoder():
+    assert CustomJSONResponse(TRANSACTION).body == stdlib_dumps(TRANSACTION)
+
+
+@pytest.mark.parametrize("value", [
+    Decimal("NaN"), Decimal("Infinity"), Decimal("-Infinity"), Decimal("sNaN")
+])
+def test_non_finite_decimal_raises_like_stdlib_encoder(value):
+    with pytest.raises(ValueError):
+        stdlib_dumps({"amount": value})
+    with pytest.raises(ValueError):
+        dumps({"amount": value})
+
+
+def test_unsupported_type_raises_type_error():
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
@@ -0,0 +1,52 @@
+import logging
+import queue
+from decimal import Decimal
+
+import pytest
+
+from app.core.logging_config import _LazyQueueHandler
+
+
+@pytest.fixture
+def queued():
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    logger = logging.getLogger("tests.lazy_queue")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = _LazyQueueHandler(records)
+    logger.addHandler(handler)
+    yield logger, records
+    logger.removeHandler(handler)
+
+
+def test_immutable_args_are_left_for_the_listener(queued):
+    logger, records = queued
+    logger.info("%s %s took %.2fs", "GET", Decimal("1.5"), 0.25)
+
+    record = records.get_nowait()
+    assert record.args == ("GET", Decimal("1.5"), 0.25)
+    assert record.getMessage() == "GET 1.5 took 0.25s"
+
+
+def test_mutable_args_are_merged_before_enqueueing(queued):
+    logger, records = queued
+    payload = {"status": "pending"}
+    logger.info("Outbox entry %s", payload)
+    payload["status"] = "sent"
+
+    record = records.get_nowait()
+    assert record.args is None
+    assert record.getMessage() == "Outbox entry {'status': 'pending'}"
+
+
+def test_traceback_is_rendered_before_enqueueing(queued):
+    logger, records = queued
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Failed")
+
+    record = records.get_nowait()
+    assert record.exc_info is None
+    assert "ValueError: boom" in record.exc_text
+    assert "ValueError: boom" in logging.Formatter().format(record)
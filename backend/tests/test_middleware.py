@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from app.core.middleware import SECURITY_HEADERS, LoggingMiddleware, SecurityHeadersMiddleware
+
+
+def http_scope() -> dict:
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": "GET",
+        "path": "/api/v1/transactions/export",
+        "raw_path": b"/api/v1/transactions/export",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+        "scheme": "http",
+    }
+
+
+async def never_disconnect() -> dict:
+    await asyncio.Event().wait()
+    return {"type": "http.disconnect"}
+
+
+def wrap(app):
+    # Same order as main.py, where the middleware added last is outermost:
+    # SecurityHeadersMiddleware is added first, so LoggingMiddleware wraps it
+    return LoggingMiddleware(SecurityHeadersMiddleware(app))
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_is_not_buffered():
+    first_chunk_sent = asyncio.Event()
+    messages = []
+
+    async def body():
+        yield b"first\n"
+        # Only reachable once the first chunk has left the middleware stack
+        await first_chunk_sent.wait()
+        yield b"second\n"
+
+    async def send(message):
+        messages.append(message)
+        if message.get("body") == b"first\n":
+            first_chunk_sent.set()
+
+    app = wrap(StreamingResponse(body(), media_type="application/x-ndjson"))
+    await asyncio.wait_for(app(http_scope(), never_disconnect, send), timeout=5)
+
+    assert [m["type"] for m in messages] == [
+        "http.response.start", "http.response.body", "http.response.body", "http.response.body"
+    ]
+    assert [m.get("body") for m in messages[1:]] == [b"first\n", b"second\n", b""]
+
+
+@pytest.mark.asyncio
+async def test_streaming_response_keeps_security_headers():
+    messages = []
+
+    async def body():
+        yield b"chunk"
+
+    async def send(message):
+        messages.append(message)
+
+    app = wrap(StreamingResponse(body()))
+    await app(http_scope(), never_disconnect, send)
+
+    headers = messages[0]["headers"]
+    for header in SECURITY_HEADERS:
+        assert header in headers
+    assert any(name == b"x-process-time" for name, _ in headers)
+
+
+@pytest.mark.asyncio
+async def test_endpoint_security_headers_are_replaced_not_duplicated():
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    response = PlainTextResponse("ok", headers={"X-Frame-Options": "SAMEORIGIN"})
+    await wrap(response)(http_scope(), never_disconnect, send)
+
+    frame_options = [value for name, value in messages[0]["headers"] if name == b"x-frame-options"]
+    assert frame_options == [b"DENY"]
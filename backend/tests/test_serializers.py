@@ -0,0 +1,66 @@
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.api.schemas import TransactionResponse
+from app.api.serializers import DocumentSerializer
+from app.models import TransactionStatus, TransactionType
+
+serializer = DocumentSerializer(TransactionResponse)
+
+
+def pydantic_dump(document) -> dict:
+    """What FastAPI renders for response_model=TransactionResponse."""
+    return TransactionResponse.model_validate(document, from_attributes=True).model_dump(
+        mode="json", by_alias=True
+    )
+
+
+def make_transaction(**overrides) -> SimpleNamespace:
+    """A row with the attribute types of a loaded Transaction document."""
+    fields = {
+        "id": ObjectId("65f1a2b3c4d5e6f708091a2b"),
+        "transaction_id": "TXN_20240101_ABCDEF12",
+        "user_id": "65f1a2b3c4d5e6f708091a2c",
+        "fund_id": "3",
+        "type": TransactionType.SUBSCRIPTION,
+        "amount": Decimal("125000.50"),
+        "status": TransactionStatus.COMPLETED,
+        "description": "Suscripción al fondo DEUDAPRIVADA",
+        "created_at": datetime(2024, 1, 1, 13, 45, 12, 123456),
+        "updated_at": datetime(2024, 1, 1, 13, 45, 12, 123456),
+        "completed_at": datetime(2024, 1, 1, 13, 45, 13),
+    }
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"description": None, "completed_at": None},
+    {"type": TransactionType.CANCELLATION, "status": TransactionStatus.FAILED},
+    {"amount": Decimal("500000")},
+    {"amount": Decimal("0.01")},
+    {"amount": Decimal("75000.00")},
+    {"amount": Decimal("1E+6")},
+])
+def test_dump_matches_response_model(overrides):
+    transaction = make_transaction(**overrides)
+    assert serializer.dump(transaction) == pydantic_dump(transaction)
+
+
+def test_dump_all_matches_response_model():
+    transactions = [make_transaction(transaction_id=f"TXN_{i}", fund_id=str(i)) for i in range(5)]
+    assert serializer.dump_all(transactions) == [pydantic_dump(t) for t in transactions]
+
+
+def test_dump_uses_aliases_and_json_types():
+    row = serializer.dump(make_transaction())
+    assert row["_id"] == "65f1a2b3c4d5e6f708091a2b"
+    assert row["fund_id"] == "3"
+    assert row["amount"] == "125000.50"
+    assert row["type"] == "subscription"
+    assert row["created_at"] == "2024-01-01T13:45:12.123456"
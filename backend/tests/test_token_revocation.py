@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.cache import BloomFilter
+from app.repositories.revoked_token_repository import revoked_token_repository
+from app.services.token_revocation_service import TokenRevocationService
+
+EXPIRES = datetime.utcnow() + timedelta(days=7)
+
+
+@pytest.fixture
+def service(database):
+    service = TokenRevocationService()
+    service._filter = BloomFilter(capacity=1024)
+    return service
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    calls = []
+    exists = revoked_token_repository.exists
+
+    async def counting_exists(jti):
+        calls.append(jti)
+        return await exists(jti)
+
+    monkeypatch.setattr(revoked_token_repository, "exists", counting_exists)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_filter_miss_skips_the_database(service, lookups):
+    assert not await service.is_revoked("valid-jti")
+    assert lookups == []
+
+
+@pytest.mark.asyncio
+async def test_filter_hit_is_confirmed(service, lookups):
+    await service.revoke("revoked-jti", "user", EXPIRES)
+
+    assert await service.is_revoked("revoked-jti")
+    assert lookups == ["revoked-jti"]
+
+
+@pytest.mark.asyncio
+async def test_false_positive_is_not_reported_as_revoked(service, lookups):
+    # In the filter, as a false positive would be, but never revoked
+    service._filter.add("valid-jti")
+
+    assert not await service.is_revoked("valid-jti")
+    assert lookups == ["valid-jti"]
+
+
+@pytest.mark.asyncio
+async def test_checks_go_to_the_database_before_the_first_build(service, lookups):
+    service._filter = None
+    await revoked_token_repository.create("revoked-jti", "user", EXPIRES)
+
+    assert await service.is_revoked("revoked-jti")
+    assert not await service.is_revoked("valid-jti")
+    assert lookups == ["revoked-jti", "valid-jti"]
+
+
+@pytest.mark.asyncio
+async def test_revoke_is_the_authoritative_reuse_check(service):
+    # Revoked on another worker; this filter has not heard of it yet
+    await revoked_token_repository.create("rotated-jti", "user", EXPIRES)
+
+    assert not await service.is_revoked("rotated-jti")
+    assert not await service.revoke("rotated-jti", "user", EXPIRES)
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.core import tracing
+from app.core.config import settings
+from app.core.tracing import SPAN_KIND_SERVER, BatchSpanProcessor, Span, traced, tracer, traced_stream
+
+
+class RecordingProcessor:
+    def __init__(self):
+        self.spans = []
+
+    def on_end(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    processor = RecordingProcessor()
+    monkeypatch.setattr(tracer, "processor", processor)
+    monkeypatch.setattr(tracer, "sample_rate", 1.0)
+    return processor.spans
+
+
+async def chunks(count: int):
+    for i in range(count):
+        await asyncio.sleep(0)
+        yield i
+
+
+@pytest.mark.asyncio
+async def test_traced_stream_span_covers_the_iteration(recorded):
+    with tracer.start_span("GET /export", SPAN_KIND_SERVER) as root:
+        stream = traced_stream("export", chunks(3))
+        assert recorded == []
+        assert [item async for item in stream] == [0, 1, 2]
+
+    export, http = recorded
+    assert export.name == "export"
+    assert export.parent_id == root.span_id
+    assert export.error is None
+    assert http is root
+
+
+@pytest.mark.asyncio
+async def test_traced_stream_passes_through_outside_a_trace(recorded):
+    stream = chunks(2)
+    assert traced_stream("export", stream) is stream
+    assert [item async for item in stream] == [0, 1]
+    assert recorded == []
+
+
+@pytest.fixture
+def traced_poll(monkeypatch):
+    monkeypatch.setattr(settings, "TRACING_ENABLED", True)
+
+    @traced("poll")
+    async def poll():
+        return "polled"
+    return poll
+
+
+@pytest.mark.asyncio
+async def test_traced_outside_a_trace_records_nothing(recorded, traced_poll):
+    assert await traced_poll() == "polled"
+    assert recorded == []
+
+
+@pytest.mark.asyncio
+async def test_traced_inside_a_trace_records_a_child(recorded, traced_poll):
+    with tracer.start_span("NotificationDispatcher.process") as root:
+        await traced_poll()
+
+    poll, process = recorded
+    assert poll.name == "poll"
+    assert poll.parent_id == root.span_id
+    assert process is root
+
+
+class FailingExporter:
+    def export(self, spans):
+        raise ConnectionError("collector down")
+
+    def close(self):
+        pass
+
+
+def test_repeated_export_failures_log_one_traceback(caplog):
+    processor = BatchSpanProcessor(FailingExporter(), max_queue_size=10)
+    with caplog.at_level(logging.INFO, logger=tracing.__name__):
+        for _ in range(5):
+            processor._export([Span("span", "0" * 32)])
+    processor.shutdown()
+
+    errors = [record for record in caplog.records if record.levelno == logging.ERROR]
+    assert len(errors) == 1
+    assert errors[0].exc_info is not None
+    assert processor._failures == 5
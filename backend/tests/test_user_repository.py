@@ -0,0 +1,64 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from bson import Decimal128
+
+from app.models import User, UserRole
+from app.repositories.user_repository import user_repository
+
+
+@pytest_asyncio.fixture
+async def user(database):
+    return await user_repository.create(
+        email="cliente@test.com", password="Test123!", full_name="Cliente Prueba"
+    )
+
+
+async def stored(user) -> dict:
+    return await User.get_motor_collection().find_one({"_id": user.id})
+
+
+@pytest.mark.asyncio
+async def test_profile_update_keeps_a_concurrent_balance_change(user, monkeypatch):
+    stale = await user_repository.get_by_id(str(user.id))
+
+    async def get_stale(user_id, session=None):
+        return stale
+
+    # A debit lands after the update read the user
+    await User.get_motor_collection().update_one(
+        {"_id": user.id}, {"$set": {"current_balance": Decimal128("400000")}}
+    )
+    monkeypatch.setattr(user_repository, "get_by_id", get_stale)
+
+    updated = await user_repository.update(str(user.id), full_name="Nuevo Nombre")
+
+    document = await stored(user)
+    assert document["full_name"] == "Nuevo Nombre"
+    assert document["current_balance"] == Decimal128("400000")
+    assert updated.current_balance == Decimal("400000")
+
+
+@pytest.mark.asyncio
+async def test_role_change_bumps_token_version(user):
+    await user_repository.update(str(user.id), role=UserRole.ADMIN)
+    assert (await stored(user))["token_version"] == 1
+
+    # Same values again: nothing to revoke
+    await user_repository.update(str(user.id), role=UserRole.ADMIN, full_name="Otro")
+    assert (await stored(user))["token_version"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_status_changes_each_bump_token_version(user):
+    await asyncio.gather(
+        user_repository.update(str(user.id), role=UserRole.ADMIN),
+        user_repository.update(str(user.id), is_active=False),
+    )
+
+    document = await stored(user)
+    assert document["role"] == "admin"
+    assert document["is_active"] is False
+    assert document["token_version"] == 2